@@ -0,0 +1,112 @@
+import importlib
+import time
+from typing import Dict
+
+from maa.agent.agent_server import AgentServer
+from maa.context import Context
+from maa.custom_action import CustomAction
+
+from utils import logger
+
+# 自定义动作清单：动作名 -> 实现所在模块
+# 新增动作时在此登记，模块在该动作首次被调用时才导入
+ACTION_MANIFEST: Dict[str, str] = {
+    "ChildRec": "action.zshg.child",
+    "ChildBatchRename": "action.zshg.child_rename",
+    "RoleListScan": "action.zshg.role_roster",
+    "TaskProcessor": "action.fight.fight_processor",
+    "FightTestFunc": "action.fight.fight_processor",
+    "MonthDetectBenchmark": "action.fight.fight_processor",
+    "YearlyTaskProcessor": "action.fight.fight_processor",
+}
+
+# 已加载的动作实现
+_actions: Dict[str, CustomAction] = {}
+# 各模块的导入耗时（秒）
+_import_times: Dict[str, float] = {}
+
+
+def custom_action(name: str):
+    """
+    自定义动作装饰器，替代 AgentServer.custom_action
+
+    只记录动作实现，不向 AgentServer 注册；AgentServer 上注册的是清单中的桩动作，
+    首次调用时导入模块并转发到这里记录的实现。
+    """
+
+    def wrapper(action):
+        if name not in ACTION_MANIFEST:
+            logger.warning(f"动作 {name} 未登记在 ACTION_MANIFEST 中，不会被调用")
+        _actions[name] = action()
+        return action
+
+    return wrapper
+
+
+def _import_module(module_path: str):
+    """导入动作模块并记录耗时，已导入的模块不重复计时"""
+    if module_path in _import_times:
+        return
+    start = time.perf_counter()
+    importlib.import_module(module_path)
+    _import_times[module_path] = time.perf_counter() - start
+    logger.debug(
+        f"导入动作模块 {module_path} 耗时 {_import_times[module_path] * 1000:.1f}ms"
+    )
+
+
+def load_action(name: str) -> CustomAction:
+    """
+    获取动作实现，所在模块尚未导入时先导入
+
+    Raises:
+        KeyError: 动作未登记，或模块中没有对应的实现
+    """
+    if name not in _actions:
+        _import_module(ACTION_MANIFEST[name])
+    if name not in _actions:
+        raise KeyError(f"模块 {ACTION_MANIFEST[name]} 中没有动作 {name}")
+    return _actions[name]
+
+
+class LazyAction(CustomAction):
+    """
+    桩动作：启动时注册，首次调用时才导入真正的实现
+    """
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+
+    def run(
+        self, context: Context, argv: CustomAction.RunArg
+    ) -> CustomAction.RunResult:
+        try:
+            action = load_action(self.name)
+        except Exception:
+            logger.exception(f"加载动作 {self.name} 失败")
+            return CustomAction.RunResult(success=False)
+        return action.run(context, argv)
+
+
+def register_lazy_actions():
+    """为清单中的每个动作向 AgentServer 注册桩动作"""
+    start = time.perf_counter()
+    for name in ACTION_MANIFEST:
+        AgentServer.register_custom_action(name, LazyAction(name))
+    logger.debug(
+        f"注册 {len(ACTION_MANIFEST)} 个桩动作，耗时 "
+        f"{(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+
+
+def log_import_report():
+    """输出已导入动作模块的耗时，以及尚未导入（启动时省下）的模块"""
+    modules = dict.fromkeys(ACTION_MANIFEST.values())
+    for module_path in modules:
+        if module_path in _import_times:
+            logger.info(
+                f"动作模块 {module_path}: {_import_times[module_path] * 1000:.1f}ms"
+            )
+        else:
+            logger.info(f"动作模块 {module_path}: 未导入")
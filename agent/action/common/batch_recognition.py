@@ -0,0 +1,67 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy
+from maa.context import Context
+from maa.define import OrRecognitionResult, RecognitionDetail
+
+# 批量识别使用的占位节点，识别方式在运行时覆盖为 Or
+BATCH_NODE = "Common_BatchRecognition"
+
+
+@dataclass
+class BatchResult:
+    """
+    批量识别结果
+
+    Or 识别命中第一个节点即停止，因此只有按优先级第一个命中的节点，
+    排在它之后的节点不会执行，也不在 details 中。
+    """
+
+    details: Dict[str, RecognitionDetail] = field(default_factory=dict)  # 已执行的节点
+    first_hit: Optional[str] = None  # 第一个命中的节点名
+
+    @property
+    def hit(self) -> bool:
+        return self.first_hit is not None
+
+    def get(self, name: str) -> Optional[RecognitionDetail]:
+        return self.details.get(name)
+
+
+def run_batch_recognition(
+    context: Context, nodes: List[str], image: numpy.ndarray
+) -> BatchResult:
+    """
+    在同一张图上按优先级批量识别多个 pipeline 节点，一次调用完成
+
+    将节点组合为 Or 识别，命中第一个即停止，与 if/elif 链的语义一致；
+    只返回按优先级第一个命中的节点，不会返回所有命中的节点。
+
+    Args:
+        context: MAA 上下文对象
+        nodes: 按优先级排列的节点名列表
+        image: 待识别的截图
+
+    Returns:
+        BatchResult: 已执行节点的识别详情及第一个命中的节点（按优先级）
+    """
+    result = BatchResult()
+    if not nodes:
+        return result
+
+    reco_detail = context.run_recognition(
+        BATCH_NODE,
+        image,
+        pipeline_override={BATCH_NODE: {"recognition": "Or", "any_of": nodes}},
+    )
+    if not reco_detail or not isinstance(reco_detail.best_result, OrRecognitionResult):
+        return result
+
+    # 子识别按 any_of 顺序执行，命中后不再继续
+    for name, sub_detail in zip(nodes, reco_detail.best_result.sub_results):
+        result.details[name] = sub_detail
+        if sub_detail.hit and result.first_hit is None:
+            result.first_hit = name
+
+    return result
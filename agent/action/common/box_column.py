@@ -0,0 +1,34 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+class BoxColumn:
+    """
+    按 Y 坐标排序的识别框（结构数组）
+
+    面板中的按钮、图标等只需按纵向范围归属到某一块内容，
+    排序后用二分查找定位，不必对每一块线性扫描所有框。
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, Any]] = ()):
+        """
+        Args:
+            items: (y, box) 序列，y 相同的框保持原有顺序
+        """
+        pairs = sorted(items, key=lambda item: item[0])
+        self.ys: List[int] = [y for y, _ in pairs]
+        self.boxes: List[Any] = [box for _, box in pairs]
+
+    def __len__(self) -> int:
+        return len(self.ys)
+
+    def first_between(self, top: int, bottom: int) -> Optional[Any]:
+        """Y 坐标在 [top, bottom] 内最靠上的框，没有时返回 None"""
+        i = bisect_left(self.ys, top)
+        if i < len(self.ys) and self.ys[i] <= bottom:
+            return self.boxes[i]
+        return None
+
+    def between(self, top: int, bottom: int) -> List[Any]:
+        """Y 坐标在 [top, bottom] 内的所有框，按 Y 排序"""
+        return self.boxes[bisect_left(self.ys, top) : bisect_right(self.ys, bottom)]
@@ -0,0 +1,122 @@
+import time
+import weakref
+from typing import Dict, Optional
+
+import numpy
+from maa.context import Context
+from maa.define import RecognitionDetail, TaskDetail
+
+from utils import logger
+
+
+class FrameProvider:
+    """
+    共享截图提供者
+
+    同一步骤内的多次识别复用同一帧截图，不再每次识别都 post_screencap。
+    通过本对象执行的点击、滑动、run_task 之后截图自动失效，下一次获取时重新截图。
+    """
+
+    def __init__(self, context: Context):
+        self._context = context
+        self._frame: Optional[numpy.ndarray] = None
+        self._generation = 0
+        self._captured_at = 0.0
+
+        # 统计信息
+        self.capture_count = 0
+        self.reuse_count = 0
+
+    @property
+    def generation(self) -> int:
+        """当前截图的代数，每次重新截图加一"""
+        return self._generation
+
+    @property
+    def age(self) -> float:
+        """当前截图距今的秒数，没有截图时返回无穷大"""
+        if self._frame is None:
+            return float("inf")
+        return time.monotonic() - self._captured_at
+
+    def get(self, fresh: bool = False) -> numpy.ndarray:
+        """
+        获取最新截图
+
+        Args:
+            fresh: 是否强制重新截图，轮询画面变化时使用
+
+        Returns:
+            numpy.ndarray: 截图
+        """
+        if fresh or self._frame is None:
+            self._frame = self._context.tasker.controller.post_screencap().wait().get()
+            self._captured_at = time.monotonic()
+            self._generation += 1
+            self.capture_count += 1
+        else:
+            self.reuse_count += 1
+        return self._frame
+
+    def invalidate(self):
+        """使当前截图失效"""
+        self._frame = None
+
+    def run_recognition(
+        self, entry: str, pipeline_override: Dict = {}, fresh: bool = False
+    ) -> Optional[RecognitionDetail]:
+        """在当前截图上执行识别"""
+        return self._context.run_recognition(entry, self.get(fresh), pipeline_override)
+
+    def run_task(
+        self, entry: str, pipeline_override: Dict = {}
+    ) -> Optional[TaskDetail]:
+        """执行任务，执行后截图失效"""
+        try:
+            return self._context.run_task(entry, pipeline_override)
+        finally:
+            self.invalidate()
+
+    def click(self, x: int, y: int):
+        """点击坐标，点击后截图失效"""
+        self._context.tasker.controller.post_click(x, y).wait()
+        self.invalidate()
+
+    def click_box(self, box):
+        """点击矩形 [x, y, w, h] 的中心"""
+        self.click(box[0] + box[2] // 2, box[1] + box[3] // 2)
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration: int = 500):
+        """滑动，滑动后截图失效"""
+        self._context.tasker.controller.post_swipe(x1, y1, x2, y2, duration).wait()
+        self.invalidate()
+
+    def log_stats(self, tag: str = ""):
+        """输出截图统计"""
+        logger.debug(
+            f"{tag}截图 {self.capture_count} 次，复用 {self.reuse_count} 次，"
+            f"当前第 {self._generation} 帧"
+        )
+
+
+# 每个 Context 对应一个 FrameProvider，Context 释放后自动回收
+_providers: "weakref.WeakKeyDictionary[Context, FrameProvider]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_frames(context: Context) -> FrameProvider:
+    """
+    获取 context 对应的共享截图提供者
+
+    Args:
+        context: MAA 上下文对象
+
+    Returns:
+        FrameProvider: 与该 context 绑定的截图提供者
+    """
+    frames = _providers.get(context)
+    if frames is None:
+        frames = FrameProvider(context)
+        _providers[context] = frames
+    return frames
@@ -0,0 +1,142 @@
+from typing import List, Optional
+
+import numpy
+from maa.context import Context
+
+from utils import logger
+from action.common.frame_provider import get_frames
+from action.common.wait_stable import wait_until_stable
+
+
+def _crop_gray(
+    image: numpy.ndarray, roi: List[int], col_step: int = 4
+) -> numpy.ndarray:
+    """裁剪 ROI 并转为灰度，列方向降采样以加快比较"""
+    x, y, w, h = roi
+    crop = image[max(y, 0) : y + h, max(x, 0) : x + w : col_step]
+    if crop.ndim == 3:
+        crop = crop.mean(axis=2)
+    return crop.astype(numpy.float32)
+
+
+def estimate_scroll_offset(
+    prev: numpy.ndarray,
+    cur: numpy.ndarray,
+    min_overlap: float = 0.25,
+    threshold: float = 6.0,
+) -> Optional[int]:
+    """
+    估计列表向上滚动的像素数
+
+    在 prev 的下部与 cur 的上部之间寻找平均灰度差最小的垂直偏移。
+
+    Args:
+        prev: 滑动前 ROI 的灰度图
+        cur: 滑动后 ROI 的灰度图
+        min_overlap: 两帧最少重叠的高度比例
+        threshold: 最小平均灰度差超过该值时视为无法拼接
+
+    Returns:
+        Optional[int]: 滚动像素数，0 表示没有滚动（到底），无法拼接返回 None
+    """
+    if prev.shape != cur.shape:
+        return None
+
+    height = prev.shape[0]
+    max_offset = int(height * (1 - min_overlap))
+    best_offset, best_diff = None, float("inf")
+    for offset in range(0, max_offset + 1):
+        diff = float(numpy.abs(prev[offset:] - cur[: height - offset]).mean())
+        if diff < best_diff:
+            best_offset, best_diff = offset, diff
+
+    if best_diff > threshold:
+        return None
+    return best_offset
+
+
+class ListScroller:
+    """
+    滚动列表读取器
+
+    每次滑动后通过像素比对估计滚动距离，只返回新露出的条带供 OCR，
+    滑动后画面没有移动即认为已到列表底部，不再需要额外的 OCR 页。
+    """
+
+    def __init__(
+        self,
+        context: Context,
+        roi: List[int],
+        swipe_task: str,
+        max_swipes: int = 10,
+        margin: int = 40,
+    ):
+        """
+        Args:
+            context: MAA 上下文对象
+            roi: 列表区域 [x, y, w, h]
+            swipe_task: 下滑一页的任务名
+            max_swipes: 最多滑动次数
+            margin: 新条带向上多取的像素，避免切断跨边界的文本行
+        """
+        self._context = context
+        self.roi = roi
+        self.swipe_task = swipe_task
+        self.max_swipes = max_swipes
+        self.margin = margin
+
+        self.swipes = 0
+        self.scrolled = 0  # 累计滚动像素
+        self.reached_end = False
+        self._prev: Optional[numpy.ndarray] = None
+
+    def first_page(self) -> List[int]:
+        """记录首屏画面，返回首屏识别区域"""
+        self._prev = _crop_gray(get_frames(self._context).get(), self.roi)
+        return self.roi
+
+    def next_page(self) -> Optional[List[int]]:
+        """
+        下滑一页
+
+        Returns:
+            Optional[List[int]]: 本次需要 OCR 的区域（新露出的条带，无法拼接时为整个列表区域），
+            到达列表底部或达到最大滑动次数时返回 None
+        """
+        if self.reached_end or self.swipes >= self.max_swipes:
+            self.reached_end = True
+            return None
+
+        frames = get_frames(self._context)
+        if self._prev is None:
+            self.first_page()
+
+        before = frames.get()
+        frames.run_task(self.swipe_task)
+        wait_until_stable(
+            self._context,
+            f"scroll_{self.swipe_task}",
+            timeout_ms=1000,
+            roi=self.roi,
+            min_ms=200,
+            before=before,
+        )
+        self.swipes += 1
+
+        cur = _crop_gray(frames.get(), self.roi)
+        offset = estimate_scroll_offset(self._prev, cur)
+        self._prev = cur
+
+        if offset == 0:
+            logger.debug(f"[{self.swipe_task}] 画面未移动，已到列表底部")
+            self.reached_end = True
+            return None
+
+        if offset is None:
+            logger.debug(f"[{self.swipe_task}] 无法拼接，识别整个列表区域")
+            return self.roi
+
+        self.scrolled += offset
+        x, y, w, h = self.roi
+        strip_h = min(h, offset + self.margin)
+        return [x, y + h - strip_h, w, strip_h]
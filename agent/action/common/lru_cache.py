@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from utils import logger
+
+
+class LRUCache:
+    """
+    带命中统计的 LRU 缓存
+
+    用于按画面指纹缓存识别结果：指纹相同的画面直接返回上次解析结果，不再 OCR。
+    """
+
+    def __init__(self, name: str, maxsize: int = 32):
+        """
+        Args:
+            name: 缓存名称，用于日志
+            maxsize: 最多保留的条目数，超出时淘汰最久未使用的条目
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取缓存值并计入命中统计，没有时返回 None"""
+        if key not in self._items:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key: Hashable, value: Any):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+    def log_stats(self):
+        """输出命中统计"""
+        logger.debug(
+            f"[{self.name}] 命中 {self.hits} 次，未命中 {self.misses} 次，"
+            f"命中率 {self.hit_rate:.0%}，缓存 {len(self._items)}/{self.maxsize} 条"
+        )
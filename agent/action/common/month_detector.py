@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from maa.context import Context
+from maa.define import AndRecognitionResult
+
+from utils import logger
+from action.common.frame_provider import FrameProvider, get_frames
+
+# 与 Map_GetMonth 的最低命中阈值一致（TemplateMatch 默认 0.7）
+MONTH_MIN_SCORE = 0.7
+# Map_DetectMonth 的 all_of 依次对应 1~12 月
+MONTH_COUNT = 12
+
+
+@dataclass
+class MonthMatch:
+    """
+    月份识别结果
+    """
+
+    month: int = -1  # 识别到的月份，1~12，未识别为 -1
+    score: float = 0.0  # 最佳模板的匹配分数
+    scores: List[float] = field(default_factory=list)  # 1~12 月模板各自的分数
+
+    @property
+    def ok(self) -> bool:
+        return self.month > 0
+
+
+def detect_month(context: Context, min_score: float = MONTH_MIN_SCORE) -> MonthMatch:
+    """
+    单帧单次识别当前游戏月份
+
+    使用 Map_DetectMonth 节点在同一帧上对 12 个月份模板一次性打分，
+    取分数最高的模板作为结果，替代逐个模板截图识别的 12 次循环。
+    子结果不足 12 个时无法确定对应的月份，改为在同一帧上逐个模板打分。
+
+    Args:
+        context: MAA 上下文对象
+        min_score: 最低置信度，低于该值视为未识别
+
+    Returns:
+        MonthMatch: 月份识别结果
+    """
+    frames = get_frames(context)
+    reco_detail = frames.run_recognition("Map_DetectMonth")
+    if not reco_detail or not isinstance(reco_detail.best_result, AndRecognitionResult):
+        logger.error("月份识别失败")
+        return MonthMatch()
+
+    # 子识别按 all_of 顺序返回，第 i 个对应 i+1 月；缺少子结果时位置会错开，不能按位置对应
+    sub_results = reco_detail.best_result.sub_results
+    if len(sub_results) == MONTH_COUNT:
+        scores = [
+            sub_detail.best_result.score if sub_detail.best_result else 0.0
+            for sub_detail in sub_results
+        ]
+    else:
+        logger.warning(
+            f"月份识别返回 {len(sub_results)} 个子结果，应为 {MONTH_COUNT} 个，改为逐个模板识别"
+        )
+        scores = [_template_score(frames, month) for month in range(1, MONTH_COUNT + 1)]
+
+    best_index = max(range(len(scores)), key=lambda i: scores[i])
+    best_score = scores[best_index]
+    if best_score < min_score:
+        logger.debug(f"月份识别置信度过低：{best_index + 1}月 {best_score:.3f}")
+        return MonthMatch(score=best_score, scores=scores)
+
+    return MonthMatch(month=best_index + 1, score=best_score, scores=scores)
+
+
+def _template_score(frames: FrameProvider, month: int) -> float:
+    """在同一帧上单独匹配一个月份模板的分数"""
+    reco_detail = frames.run_recognition(
+        "Map_GetMonth",
+        pipeline_override={
+            "Map_GetMonth": {"template": f"UI/month/{month}.png", "threshold": 0.0}
+        },
+    )
+    if not reco_detail or not reco_detail.best_result:
+        return 0.0
+    return reco_detail.best_result.score
@@ -0,0 +1,133 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from action.common.lru_cache import LRUCache
+
+# 索引支持的最大编辑距离
+MAX_DISTANCE = 2
+# 默认每这么多个字容忍一个 OCR 错字
+CHARS_PER_EDIT = 8
+# 查询结果缓存的条目数
+MATCH_CACHE_SIZE = 256
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein 编辑距离，超过 limit 时提前返回 limit + 1
+
+    Args:
+        a: 字符串 a
+        b: 字符串 b
+        limit: 关心的最大距离
+
+    Returns:
+        int: 编辑距离，不超过 limit + 1
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return min(prev[-1], limit + 1)
+
+
+def default_max_distance(text: str) -> int:
+    """
+    按长度比例决定容忍的 OCR 错字数
+
+    中文名称一个字之差往往就是另一个名称，常见的 4~7 字名称只做完全匹配，
+    每 CHARS_PER_EDIT 个字才容忍一个错字。
+    """
+    return min(len(text) // CHARS_PER_EDIT, MAX_DISTANCE)
+
+
+def _deletes(text: str, depth: int) -> Set[str]:
+    """text 本身及删除至多 depth 个字符得到的所有变体"""
+    variants = {text}
+    frontier = {text}
+    for _ in range(depth):
+        frontier = {
+            word[:i] + word[i + 1 :] for word in frontier for i in range(len(word))
+        }
+        variants |= frontier
+    return variants
+
+
+class NameIndex:
+    """
+    名称模糊索引
+
+    对称删除索引：预先为每个名称生成删除至多 MAX_DISTANCE 个字符的变体，
+    查询时对文本做同样的删除，只有变体相同的名称才计算编辑距离，
+    不需要与每个名称逐一比较。查询结果按文本缓存（LRU，最多 MATCH_CACHE_SIZE 条），
+    加入新名称时清空缓存。
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: Set[str] = set()
+        self._variants: Dict[str, List[str]] = {}
+        self._cache = LRUCache("名称匹配", MATCH_CACHE_SIZE)
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str):
+        if not name or name in self._names:
+            return
+        self._names.add(name)
+        self._cache.clear()
+        for variant in _deletes(name, MAX_DISTANCE):
+            self._variants.setdefault(variant, []).append(name)
+
+    def search(self, text: str, max_distance: int) -> List[Tuple[int, str]]:
+        """返回与 text 编辑距离不超过 max_distance 的 (距离, 名称)，按距离排序"""
+        max_distance = min(max_distance, MAX_DISTANCE)
+        candidates = set()
+        for variant in _deletes(text, max_distance):
+            candidates.update(self._variants.get(variant, ()))
+
+        found = []
+        for name in candidates:
+            distance = edit_distance(text, name, max_distance)
+            if distance <= max_distance:
+                found.append((distance, name))
+        return sorted(found)
+
+    def match(self, text: str, max_distance: Optional[int] = None) -> Optional[str]:
+        """
+        查找 text 对应的规范名称
+
+        Args:
+            text: OCR 文本
+            max_distance: 容忍的编辑距离，默认按文本长度决定
+
+        Returns:
+            Optional[str]: 完全匹配或唯一最近的名称；没有或有多个同样近的名称时返回 None
+        """
+        if text in self._names:
+            return text
+        if max_distance is None and text in self._cache:
+            return self._cache.get(text)
+
+        limit = default_max_distance(text) if max_distance is None else max_distance
+        result = None
+        if limit > 0:
+            found = self.search(text, limit)
+            if found and (len(found) == 1 or found[0][0] < found[1][0]):
+                result = found[0][1]
+
+        if max_distance is None:
+            self._cache.put(text, result)
+        return result
@@ -0,0 +1,119 @@
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy
+
+from utils import logger
+
+
+def roi_signature(
+    image: numpy.ndarray, roi: Optional[List[int]] = None, step: int = 8
+) -> numpy.ndarray:
+    """计算 ROI [x, y, w, h] 的降采样灰度签名，roi 为空时使用整张截图"""
+    if roi:
+        x, y, w, h = roi
+        image = image[max(y, 0) : y + h, max(x, 0) : x + w]
+    small = image[::step, ::step]
+    if small.ndim == 3:
+        small = small.mean(axis=2)
+    return small.astype(numpy.int16)
+
+
+def signature_diff(a: numpy.ndarray, b: numpy.ndarray, block: int = 4) -> float:
+    """
+    两个签名的分块灰度差：按 block×block 个采样点分块求平均灰度差，取最大的一块
+
+    整体平均会被大片静止区域冲淡（如 200×80 的按钮变亮 40 级，在整屏上平均不到 2），
+    分块取最大值后按钮、弹窗等局部变化也能检测到。尺寸不一致时视为完全不同。
+    """
+    if a.shape != b.shape:
+        return float("inf")
+    if not a.size:
+        return 0.0
+    diff = numpy.abs(a - b).astype(numpy.float32)
+    rows = numpy.arange(0, diff.shape[0], block)
+    cols = numpy.arange(0, diff.shape[1], block)
+    sums = numpy.add.reduceat(numpy.add.reduceat(diff, rows, axis=0), cols, axis=1)
+    counts = numpy.outer(
+        numpy.diff(numpy.append(rows, diff.shape[0])),
+        numpy.diff(numpy.append(cols, diff.shape[1])),
+    )
+    return float((sums / counts).max())
+
+
+class ScreenChangeGate:
+    """
+    画面变化门控
+
+    对 ROI 做降采样灰度签名，签名与上次相比没有明显变化时直接复用上次的识别结果，
+    跳过 OCR / 模板匹配等耗时识别。用于轮询循环中画面静止的情况。
+    """
+
+    def __init__(self, name: str, threshold: float = 2.0, step: int = 8):
+        """
+        Args:
+            name: 门控名称，用于日志
+            threshold: 分块灰度差阈值（0~255），任意一块超过即视为画面变化
+            step: 降采样步长（像素）
+        """
+        self.name = name
+        self.threshold = threshold
+        self.step = step
+        self._signatures: Dict[str, numpy.ndarray] = {}
+        self._results: Dict[str, Any] = {}
+
+        # 统计信息
+        self.evaluated = 0  # 实际执行识别次数
+        self.skipped = 0  # 画面未变化、复用结果次数
+
+    def changed(
+        self, key: str, image: numpy.ndarray, roi: Optional[List[int]] = None
+    ) -> bool:
+        """判断 key 对应的 ROI 相比上次是否变化，并更新签名"""
+        sig = roi_signature(image, roi, self.step)
+        prev = self._signatures.get(key)
+        self._signatures[key] = sig
+        if prev is None:
+            return True
+        return signature_diff(sig, prev) > self.threshold
+
+    def run(
+        self,
+        key: str,
+        image: numpy.ndarray,
+        recognize: Callable[[], Any],
+        roi: Optional[List[int]] = None,
+    ) -> Any:
+        """
+        画面变化时执行识别，否则复用上次结果
+
+        Args:
+            key: 识别项标识，不同识别项分别缓存
+            image: 当前截图
+            recognize: 实际执行识别的函数
+            roi: 参与比较的区域，默认整张截图
+
+        Returns:
+            识别结果
+        """
+        if not self.changed(key, image, roi) and key in self._results:
+            self.skipped += 1
+            return self._results[key]
+
+        self.evaluated += 1
+        result = recognize()
+        self._results[key] = result
+        return result
+
+    def reset(self):
+        """清空签名和缓存的识别结果"""
+        self._signatures.clear()
+        self._results.clear()
+
+    def log_stats(self):
+        total = self.evaluated + self.skipped
+        if not total:
+            return
+        logger.debug(
+            f"[{self.name}] 识别 {self.evaluated} 次，画面未变化跳过 {self.skipped} 次"
+            f"（{self.skipped * 100 / total:.0f}%）"
+        )
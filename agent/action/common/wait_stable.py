@@ -0,0 +1,105 @@
+import time
+from typing import Dict, List, Optional
+
+import numpy
+from maa.context import Context
+
+from utils import logger
+from action.common.frame_provider import get_frames
+from action.common.screen_change import roi_signature, signature_diff
+
+# 各调用点历史稳定耗时（秒）的滑动平均
+_settle_history: Dict[str, float] = {}
+# 滑动平均中新样本的权重
+_HISTORY_WEIGHT = 0.3
+# 两次截图之间的间隔（秒）
+POLL_INTERVAL = 0.1
+
+
+def wait_until_stable(
+    context: Context,
+    key: str,
+    timeout_ms: int = 2000,
+    target: Optional[str] = None,
+    roi: Optional[List[int]] = None,
+    threshold: float = 2.0,
+    min_ms: int = 0,
+    before: Optional[numpy.ndarray] = None,
+) -> bool:
+    """
+    等待画面稳定或目标出现，替代固定时长的 time.sleep
+
+    点击后界面往往还没来得及响应，此时连续两帧也是相同的，因此必须先看到画面变化
+    （与动作前的截图 before 或上一帧相比），之后连续两帧 ROI 签名无明显变化才视为稳定；
+    指定 target 时目标节点命中也立即返回。
+    开始时先休眠 min_ms，传入 before 时至少休眠该调用点历史稳定耗时的一半，快设备少等、慢设备多等；
+    之后每隔 POLL_INTERVAL 截图检查一次。没有 before 时以开始等待时的截图作为变化参照。
+    等待结束时的截图保留在 FrameProvider 中供后续识别复用。
+
+    Args:
+        context: MAA 上下文对象
+        key: 调用点标识，用于记录该处的历史稳定耗时
+        timeout_ms: 最长等待时间（毫秒）
+        target: 目标节点名，命中即返回
+        roi: 判断稳定的区域，默认整张截图
+        threshold: 分块灰度差阈值，低于该值视为两帧相同
+        min_ms: 最短等待时间（毫秒）
+        before: 动作前的截图，用于判断画面是否已经开始变化
+
+    Returns:
+        bool: 在超时前稳定或目标出现返回 True，超时返回 False
+    """
+    frames = get_frames(context)
+    timeout = timeout_ms / 1000
+    min_wait = min(min_ms / 1000, timeout)
+    start = time.monotonic()
+
+    if before is None:
+        before = frames.get(fresh=True)
+        initial = min_wait
+    else:
+        initial = max(min_wait, min(_settle_history.get(key, 0.0) * 0.5, timeout))
+    ref_sig = roi_signature(before, roi)
+    if initial > 0:
+        time.sleep(initial)
+
+    prev_sig = None
+    changed = False
+    settled = False
+    while True:
+        image = frames.get(fresh=True)
+        if target and context.run_recognition(target, image).hit:
+            settled = True
+            break
+
+        sig = roi_signature(image, roi)
+        if changed:
+            if signature_diff(sig, prev_sig) <= threshold:
+                settled = True
+                break
+        else:
+            changed = any(
+                base is not None and signature_diff(sig, base) > threshold
+                for base in (ref_sig, prev_sig)
+            )
+        prev_sig = sig
+
+        remaining = timeout - (time.monotonic() - start)
+        if context.tasker.stopping or remaining <= 0:
+            break
+        time.sleep(min(POLL_INTERVAL, remaining))
+
+    elapsed = time.monotonic() - start
+    if not settled:
+        logger.debug(
+            f"[{key}] 等待画面稳定超时（{timeout_ms}ms，"
+            f"{'画面仍在变化' if changed else '未检测到画面变化'}）"
+        )
+        return False
+
+    # 只用成功的等待更新历史耗时，超时不代表界面的实际响应时间
+    prev = _settle_history.get(key)
+    _settle_history[key] = (
+        elapsed if prev is None else prev + (elapsed - prev) * _HISTORY_WEIGHT
+    )
+    return True
@@ -0,0 +1,121 @@
+import time
+from dataclasses import dataclass
+from enum import Enum
+
+from maa.context import Context
+
+from utils import logger
+from action.common.batch_recognition import run_batch_recognition
+from action.common.frame_provider import get_frames
+
+
+class FightOutcome(Enum):
+    VICTORY = "victory"  # 战斗胜利
+    FAIL = "fail"  # 战斗失败
+    STOPPED = "stopped"  # 任务被停止
+    TIMEOUT = "timeout"  # 超出回合数或时间预算
+
+
+@dataclass
+class FightConfig:
+    """
+    战斗循环配置
+    """
+
+    max_rounds: int = 50  # 最大回合数
+    max_seconds: float = 600.0  # 最长战斗时间（秒）
+    min_interval: float = 0.2  # 最短轮询间隔（秒）
+    max_interval: float = 2.0  # 最长轮询间隔（秒）
+    backoff: float = 1.5  # 无可操作画面时轮询间隔的增长倍数
+
+
+# 每帧只做一次组合识别，按优先级排列：结束状态 > 回合提示 > 结束回合按钮
+# 对方回合时结束回合按钮仍会显示，回合提示排在前面，用来判断当前轮到哪一方
+FIGHT_STATE_NODES = [
+    "FightFail",
+    "FightVictory",
+    "FightOurRound",
+    "FightRivalRound",
+    "FightEndRound",
+]
+
+
+@dataclass
+class FightResult:
+    outcome: FightOutcome
+    rounds: int = 0
+    polls: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        """战斗已分出胜负"""
+        return self.outcome in (FightOutcome.VICTORY, FightOutcome.FAIL)
+
+
+def run_fight_loop(context: Context, config: FightConfig = None) -> FightResult:
+    """
+    战斗状态机：轮询画面直到战斗结束
+
+    每帧一次组合识别判断战斗状态，记录最近一次看到的回合提示，
+    只在最近一次是己方回合时点击结束回合；
+    对方回合或动画播放期间逐步拉长轮询间隔，己方操作后恢复最短间隔。
+
+    Args:
+        context: MAA 上下文对象
+        config: 战斗循环配置，默认使用 FightConfig()
+
+    Returns:
+        FightResult: 战斗结果
+    """
+    config = config or FightConfig()
+    frames = get_frames(context)
+
+    start = time.monotonic()
+    interval = config.min_interval
+    rounds = 0
+    polls = 0
+    # 最近一次看到的回合提示
+    last_turn = None
+
+    def finish(outcome: FightOutcome) -> FightResult:
+        return FightResult(outcome, rounds, polls, time.monotonic() - start)
+
+    while True:
+        if context.tasker.stopping:
+            return finish(FightOutcome.STOPPED)
+        if rounds >= config.max_rounds:
+            logger.warning(f"\n战斗超过 {config.max_rounds} 回合，放弃等待")
+            return finish(FightOutcome.TIMEOUT)
+        if time.monotonic() - start > config.max_seconds:
+            logger.warning(f"\n战斗超过 {config.max_seconds:.0f} 秒，放弃等待")
+            return finish(FightOutcome.TIMEOUT)
+
+        polls += 1
+        image = frames.get(fresh=True)
+        state = run_batch_recognition(context, FIGHT_STATE_NODES, image).first_hit
+
+        if state == "FightFail":
+            frames.run_task("FightFail")
+            return finish(FightOutcome.FAIL)
+        if state == "FightVictory":
+            frames.run_task("FightVictory")
+            return finish(FightOutcome.VICTORY)
+        if state in ("FightOurRound", "FightRivalRound"):
+            last_turn = state
+        elif state == "FightEndRound" and last_turn == "FightOurRound":
+            frames.run_task("FightEndRound")
+            rounds += 1
+            # 结束回合后轮到对方，等下一次己方回合提示再点击
+            last_turn = "FightRivalRound"
+            interval = config.min_interval
+            print(f"\r[info]战斗中，当前{rounds}回合...", flush=True, end="")
+            continue
+
+        if last_turn == "FightOurRound":
+            # 己方回合提示已出现，结束回合按钮即将可用
+            interval = config.min_interval
+        else:
+            # 对方回合或动画播放中
+            interval = min(interval * config.backoff, config.max_interval)
+        time.sleep(interval)
@@ -1,66 +1,112 @@
-from maa.agent.agent_server import AgentServer
 from maa.context import Context
 from maa.custom_action import CustomAction
+from dataclasses import dataclass
+from typing import Optional
 from utils import logger
+import json
 import time
 
 import action.fight.fight_utils as fight_utils
-
-
-def preprocess_events(context: Context) -> bool:
+from action.common.action_registry import custom_action
+from action.common.batch_recognition import run_batch_recognition
+from action.common.frame_provider import get_frames
+from action.common.screen_change import ScreenChangeGate
+from action.common.wait_stable import wait_until_stable
+from action.common.month_detector import detect_month
+from action.fight.game_calendar import GameCalendar
+
+
+@dataclass
+class RandomEvent:
+    """
+    随机事件定义，新增事件只需在 RANDOM_EVENTS 中添加一项
+    """
+
+    event_type: str  # 事件类型标识
+    name: str  # 事件名称，用于日志
+    node: str  # 识别节点
+    task: str  # 处理任务
+    month: Optional[int] = None  # 只在某个月份出现的事件，用于校验日历
+
+
+# 按优先级排列，同一帧命中多个事件时只处理第一个
+RANDOM_EVENTS = [
+    RandomEvent(
+        "mercenary_join", "佣兵加入", "Event_MercenaryJoin", "Event_MercenaryJoin"
+    ),
+    # 使用新的子项信息识别功能，进行信息识别和命名
+    RandomEvent(
+        "mercenary_baby", "佣兵生娃", "Event_MercenaryBaby", "Auto_PannelCheck"
+    ),
+    RandomEvent(
+        "harvest_festival",
+        "丰收节",
+        "Event_HarvestFestival",
+        "Event_HarvestFestivalDealWith",
+        month=8,
+    ),
+]
+
+_EVENTS_BY_NODE = {event.node: event for event in RANDOM_EVENTS}
+
+_event_gate = ScreenChangeGate("随机事件")
+
+
+def preprocess_events(
+    context: Context, calendar: Optional[GameCalendar] = None
+) -> bool:
     """前处理：检测并处理随机事件"""
     logger.info("检测随机事件...")
 
+    frames = get_frames(context)
+    # 上个月的画面签名和识别结果不能沿用
+    _event_gate.reset()
     max_iterations = 10
     for i in range(max_iterations):
-        screenshot = context.tasker.controller.post_screencap().wait().get()
-        event_type = detect_and_manage_event(context, screenshot)
+        screenshot = frames.get()
+        event = detect_and_manage_event(context, screenshot)
 
-        if event_type is None:
+        if event is None:
+            _event_gate.log_stats()
             return True
 
+        # 只在特定月份出现的事件可用来校验日历
+        if calendar and event.month is not None:
+            calendar.expect(event.month)
+
     return True
 
 
-def detect_and_manage_event(context: Context, screenshot) -> str:
-    """检测事件类型"""
-    if context.run_recognition("Event_MercenaryJoin", screenshot).hit:
-        logger.info("检测到佣兵加入事件")
-        context.run_task("Event_MercenaryJoin")
-        return "mercenary_join"
-    elif context.run_recognition("Event_MercenaryBaby", screenshot).hit:
-        logger.info("检测到佣兵生娃事件")
-        # 使用新的子项信息识别功能，进行信息识别和命名
-        context.run_task("Auto_PannelCheck")
-        return "mercenary_baby"
-    elif context.run_recognition("Event_HarvestFestival", screenshot).hit:
-        logger.info("检测到丰收节事件")
-        context.run_task("Event_HarvestFestivalDealWith")
-        return "harvest_festival"
-    else:
+def detect_and_manage_event(context: Context, screenshot) -> Optional[RandomEvent]:
+    """检测并处理事件，所有事件节点在同一帧上一次识别，画面未变化时复用上次结果"""
+    result = _event_gate.run(
+        "events",
+        screenshot,
+        lambda: run_batch_recognition(
+            context, [event.node for event in RANDOM_EVENTS], screenshot
+        ),
+    )
+    if not result.hit:
         return None
 
+    event = _EVENTS_BY_NODE[result.first_hit]
+    logger.info(f"检测到{event.name}事件")
+    get_frames(context).run_task(event.task)
+    return event
+
 
 def check_current_month(context: Context) -> int:
     """检查当前月份"""
-    for month in range(1, 13):
-        template_name = f"UI/month/{month}.png"
-        result = context.run_recognition(
-            "Map_GetMonth",
-            context.tasker.controller.post_screencap().wait().get(),
-            pipeline_override={
-                "Map_GetMonth": {
-                    "recognition": "TemplateMatch",
-                    "template": template_name,
-                    "roi": [58, 2, 610, 221],
-                }
-            },
-        )
-        if result.hit:
-            return month
+    match = detect_month(context)
+    if match.ok:
+        return match.month
     return None
 
 
+# 节日处理需要操作界面的月份：启航节、丰收节、勇士节
+FESTIVAL_ACTION_MONTHS = (3, 8, 10)
+
+
 def handle_festival_by_month(context: Context, month: int) -> bool:
     """根据月份处理节日"""
     if month == 2:
@@ -68,7 +114,7 @@ def handle_festival_by_month(context: Context, month: int) -> bool:
         return True
     elif month == 3:
         logger.info("本月：启航节")
-        return handle_sailing_festival(context)
+        return handle_sailing_festival(context, month)
     elif month == 5:
         logger.info("本月：春林节，跳过")
         return True
@@ -92,64 +138,61 @@ def handle_festival_by_month(context: Context, month: int) -> bool:
         return True
 
 
-def handle_sailing_festival(context: Context) -> bool:
-    """处理启航节（3月）"""
-    current_month = check_current_month(context)
+def handle_sailing_festival(context: Context, month: Optional[int] = None) -> bool:
+    """
+    处理启航节（3月）
+
+    month 须是从画面确认过的月份，未传入时从画面识别
+    """
+    current_month = month if month is not None else check_current_month(context)
     if current_month != 3:
         logger.warning(f"当前月份不是3月，而是{current_month}月，跳过启航节")
         return True
 
-    if not context.run_recognition(
-        "Event_Launch", context.tasker.controller.post_screencap().wait().get()
-    ).hit:
+    frames = get_frames(context)
+    if not frames.run_recognition("Event_Launch").hit:
         logger.info("启航节已过")
         return True
 
-    context.run_task("Event_Launch")
-    if context.run_recognition(
-        "Event_LaunchEnter", context.tasker.controller.post_screencap().wait().get()
-    ).hit:
-        context.run_task("Event_LaunchEnter")
-    elif context.run_recognition(
-        "Event_LaunchLongDistance",
-        context.tasker.controller.post_screencap().wait().get(),
-    ).hit:
+    frames.run_task("Event_Launch")
+    if frames.run_recognition("Event_LaunchEnter").hit:
+        frames.run_task("Event_LaunchEnter")
+    elif frames.run_recognition("Event_LaunchLongDistance").hit:
         logger.info("启航节城市距离过远")
         return False
 
-    if context.run_recognition(
-        "Event_LaunchPage", context.tasker.controller.post_screencap().wait().get()
-    ).hit:
-        context.run_task("Event_LaunchPage")
+    if frames.run_recognition("Event_LaunchPage").hit:
+        frames.run_task("Event_LaunchPage")
     else:
         logger.error("无法进入启航节页面")
         return False
 
-    recoDetail = context.run_recognition(
-        "Event_LaunchGoods", context.tasker.controller.post_screencap().wait().get()
-    )
+    recoDetail = frames.run_recognition("Event_LaunchGoods")
 
     if recoDetail.hit:
         logger.info(f"检测到{len(recoDetail.filtered_results)}件商品")
         for good in recoDetail.filtered_results:
-            box = good.box
-            rect_x, rect_y = box[0] + box[2] // 2, box[1] + box[3] // 2
             logger.info(f"点击商品：{good.text}")
-            context.tasker.controller.post_click(rect_x, rect_y).wait()
-            time.sleep(0.5)
-            context.run_task("Event_LaunchGoodsBuy")
-
-            if context.run_recognition(
-                "Event_LaunchGoodsBuyMax",
-                context.tasker.controller.post_screencap().wait().get(),
-            ).hit:
-                context.run_task("Event_LaunchGoodsBuyMax")
-
-            context.run_task("Event_LaunchGoodsBuyConfirm")
+            before = frames.get()
+            frames.click_box(good.box)
+            wait_until_stable(
+                context,
+                "launch_goods",
+                timeout_ms=1500,
+                target="Event_LaunchGoodsBuy",
+                min_ms=300,
+                before=before,
+            )
+            frames.run_task("Event_LaunchGoodsBuy")
+
+            if frames.run_recognition("Event_LaunchGoodsBuyMax").hit:
+                frames.run_task("Event_LaunchGoodsBuyMax")
+
+            frames.run_task("Event_LaunchGoodsBuyConfirm")
     else:
         logger.info("没有商品")
 
-    context.run_task("UI_ReturnBigMap")
+    frames.run_task("UI_ReturnBigMap")
     return True
 
 
@@ -165,25 +208,46 @@ def handle_warrior_festival(context: Context) -> bool:
     return True
 
 
-def process_single_month(context: Context) -> bool:
-    """处理单个月份的完整流程"""
+def process_single_month(
+    context: Context, calendar: Optional[GameCalendar] = None
+) -> bool:
+    """
+    处理单个月份的完整流程
+
+    Args:
+        context: MAA 上下文对象
+        calendar: 游戏日历，传入时由日历推算月份，否则每次从画面识别
+    """
     logger.info("========== 开始月份处理 ==========")
 
-    preprocess_events(context)
+    preprocess_events(context, calendar)
 
-    month = check_current_month(context)
+    if calendar is None:
+        month = check_current_month(context)
+    else:
+        month = calendar.current(context)
+        # 节日处理会操作界面，推算的月份先从画面确认，推算有误时不执行其他月份的处理
+        if month in FESTIVAL_ACTION_MONTHS:
+            month = calendar.current(context, verify=True)
     if month is None:
         return False
 
     logger.info(f"当前月份：{month}月")
     handle_festival_by_month(context, month)
 
-    fight_utils.start_task(context)
+    result = fight_utils.start_task(context)
+
+    # 战斗分出胜负即过去一个月；超时、被停止或未进入战斗时无法确定月份是否变化，下次重新识别
+    if calendar is not None:
+        if result is not None and result.finished:
+            calendar.advance()
+        else:
+            calendar.invalidate()
 
     return True
 
 
-@AgentServer.custom_action("TaskProcessor")
+@custom_action("TaskProcessor")
 class TaskProcessor(CustomAction):
     def run(
         self, context: Context, argv: CustomAction.RunArg
@@ -200,16 +264,69 @@ class TaskProcessor(CustomAction):
         return CustomAction.RunResult(success=True)
 
 
-@AgentServer.custom_action("FightTestFunc")
+@custom_action("FightTestFunc")
 class FightTestFunc(CustomAction):
     def run(
         self, context: Context, argv: CustomAction.RunArg
     ) -> CustomAction.RunResult:
-        fight_utils.start_task(context)
+        result = fight_utils.start_task(context)
+        return CustomAction.RunResult(success=result is not None and result.finished)
+
+
+def _legacy_check_current_month(context: Context) -> int:
+    """旧版逐模板识别月份，仅用于基准对比"""
+    frames = get_frames(context)
+    for month in range(1, 13):
+        if frames.run_recognition(
+            "Map_GetMonth",
+            pipeline_override={"Map_GetMonth": {"template": f"UI/month/{month}.png"}},
+            fresh=True,
+        ).hit:
+            return month
+    return None
+
+
+@custom_action("MonthDetectBenchmark")
+class MonthDetectBenchmark(CustomAction):
+    """
+    月份识别基准：对比逐模板识别与单帧识别的截图次数和耗时
+    """
+
+    def run(
+        self, context: Context, argv: CustomAction.RunArg
+    ) -> CustomAction.RunResult:
+        rounds = 5
+        if argv.custom_action_param:
+            try:
+                rounds = int(json.loads(argv.custom_action_param).get("rounds", 5))
+            except (ValueError, TypeError, AttributeError):
+                logger.warning(f"无效的基准参数：{argv.custom_action_param}")
+
+        frames = get_frames(context)
+        for label, func in (
+            ("逐模板识别", _legacy_check_current_month),
+            ("单帧识别", check_current_month),
+        ):
+            frames.invalidate()
+            captures_before = frames.capture_count
+            start = time.perf_counter()
+            month = None
+            for _ in range(rounds):
+                # 每轮从新画面开始，模拟一次独立的月份检查
+                frames.invalidate()
+                month = func(context)
+            elapsed = time.perf_counter() - start
+            captures = frames.capture_count - captures_before
+            logger.info(
+                f"[月份识别基准] {label}：结果 {month}月，"
+                f"平均截图 {captures / rounds:.1f} 次/调用，"
+                f"平均耗时 {elapsed * 1000 / rounds:.1f} ms/调用"
+            )
+
         return CustomAction.RunResult(success=True)
 
 
-@AgentServer.custom_action("YearlyTaskProcessor")
+@custom_action("YearlyTaskProcessor")
 class YearlyTaskProcessor(CustomAction):
     def run(
         self, context: Context, argv: CustomAction.RunArg
@@ -222,13 +339,29 @@ class YearlyTaskProcessor(CustomAction):
 
         logger.info("团长大人, 您回来了！")
 
+        calendar = GameCalendar()
+        if calendar.current(context) is not None:
+            festivals = "、".join(
+                f"{month}月{name}" for month, name in calendar.upcoming_festivals()
+            )
+            logger.info(f"当前{calendar.month}月，未来一年节日：{festivals}")
+
         for month_offset in range(12):
             if context.tasker.stopping:
                 logger.info(f"已停止处理第 {month_offset + 1}/12 个月")
                 break
             logger.info(f"========== 开始处理第 {month_offset + 1}/12 个月 ==========")
-            process_single_month(context)
-            time.sleep(3)
-
+            process_single_month(context, calendar)
+            # 原先固定等待 3 秒。月初弹窗可能在回到主界面后才出现，先留出 1.5 秒，
+            # 之后主界面命中即检测下个月的事件
+            wait_until_stable(
+                context,
+                "next_month",
+                timeout_ms=6000,
+                target="UI_MainWindows",
+                min_ms=1500,
+            )
+
+        logger.info(f"月份识别共 {calendar.detect_count} 次")
         logger.info("========== 年度任务处理完成 ==========")
         return CustomAction.RunResult(success=True)
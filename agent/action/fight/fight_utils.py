@@ -1,35 +1,46 @@
 from maa.agent.agent_server import AgentServer
 from maa.context import Context
 from maa.custom_action import CustomAction
-import time
+from typing import Dict, List, Optional, Set, Tuple
 
 from utils import logger
-from action.zshg.task_extractor import TaskExtractor
+from action.common.frame_provider import get_frames
+from action.common.list_scroller import ListScroller
+from action.common.month_detector import detect_month
+from action.common.screen_change import ScreenChangeGate
+from action.common.wait_stable import wait_until_stable
+from action.fight.fight_loop import (
+    FightConfig,
+    FightOutcome,
+    FightResult,
+    run_fight_loop,
+)
+from action.fight.task_ranking import get_fight_stats, load_task_policy, rank_tasks
+from action.zshg.task_extractor import TaskInfo, get_task_extractor
+
+# 城市任务面板的任务列表区域
+TASK_PANEL_ROI = [15, 382, 697, 841]
+
+# 与 FightResultLearnSkill 的 roi 一致
+LEARN_SKILL_ROI = [230, 181, 234, 326]
+
+_learn_skill_gate = ScreenChangeGate("学习技能")
 
 
 def Map_CheckCurrentMonth(context: Context) -> int:
     """
-    将月份字符串转换为整数表示
+    识别当前游戏月份
 
     Args:
-        month (str): 月份字符串，例如 "1月"、"2月" 等
+        context: MAA 上下文对象
 
     Returns:
-        int: 月份的整数表示，范围为 1 到 12
+        int: 月份的整数表示，范围为 1 到 12，未识别到返回 -1
     """
-
-    for i in range(1, 13):
-        if recoDetail := context.run_recognition(
-            "Map_GetMonth",
-            context.tasker.controller.post_screencap().wait().get(),
-            pipeline_override={
-                "Map_GetMonth": {
-                    "template": f"UI/month/{i}.png",
-                }
-            },
-        ).hit:
-            logger.info(f"当前游戏月份为：{i}月")
-            return i
+    match = detect_month(context)
+    if match.ok:
+        logger.info(f"当前游戏月份为：{match.month}月（置信度 {match.score:.2f}）")
+        return match.month
     logger.error("未识别到当前游戏月份")
     return -1
 
@@ -45,21 +56,16 @@ def ensure_at_bigmap(context: Context, auto_return: bool = True) -> bool:
     Returns:
         bool: 成功在大地图返回True，否则返回False
     """
-    if context.run_recognition(
-        "UI_MainWindows",
-        context.tasker.controller.post_screencap().wait().get(),
-    ).hit:
+    frames = get_frames(context)
+    if frames.run_recognition("UI_MainWindows").hit:
         return True
 
     if not auto_return:
         return False
 
-    context.run_task("UI_ReturnBigMap")
+    frames.run_task("UI_ReturnBigMap")
 
-    if context.run_recognition(
-        "UI_MainWindows",
-        context.tasker.controller.post_screencap().wait().get(),
-    ).hit:
+    if frames.run_recognition("UI_MainWindows").hit:
         return True
 
     return False
@@ -78,42 +84,42 @@ def ensure_task_accepted(context: Context) -> bool:
     Returns:
         bool: True 表示已接取任务，False 表示未接取
     """
-    if not context.run_recognition(
-        "UI_TaskPannelPageClose",
-        context.tasker.controller.post_screencap().wait().get(),
-    ).hit:
-        context.run_task("UI_TaskPannelPageOpen")
-
-    if context.run_recognition(
-        "TaskQuickLocation", context.tasker.controller.post_screencap().wait().get()
-    ).hit:
+    frames = get_frames(context)
+    if not frames.run_recognition("UI_TaskPannelPageClose").hit:
+        frames.run_task("UI_TaskPannelPageOpen")
+
+    if frames.run_recognition("TaskQuickLocation").hit:
         return True
 
     return False
 
 
-def start_task(context: Context) -> bool:
+def start_task(
+    context: Context, fight_config: FightConfig = None
+) -> Optional[FightResult]:
     """
     开始执行任务流程
 
     Args:
         context: MAA 上下文对象
+        fight_config: 战斗循环配置，默认使用 FightConfig()
 
     Returns:
-        bool: 任务执行成功返回 True，否则返回 False
+        Optional[FightResult]: 战斗结果，未接取任务或未进入战斗时返回 None
     """
     logger.info("=== 开始执行任务流程 ===")
 
-    if not _preprocess_accept_task(context):
-        return False
+    ready, task_name = _preprocess_accept_task(context)
+    if not ready:
+        return None
 
-    _process_fight(context)
+    result = _process_fight(context, fight_config, task_name)
 
     logger.info("=== 任务流程执行结束 ===")
-    return True
+    return result
 
 
-def _preprocess_accept_task(context: Context) -> bool:
+def _preprocess_accept_task(context: Context) -> Tuple[bool, Optional[str]]:
     """
     前处理阶段：检测并接取任务
 
@@ -121,157 +127,255 @@ def _preprocess_accept_task(context: Context) -> bool:
         context: MAA 上下文对象
 
     Returns:
-        bool: 前处理成功返回 True
+        Tuple[bool, Optional[str]]: 前处理是否成功，以及本次接取的任务名称
+            （沿用之前已接取的任务时名称未知，为 None）
     """
     logger.info("====== 接取任务 ======")
 
     if not ensure_at_bigmap(context):
-        return False
+        return False, None
 
     if ensure_task_accepted(context):
-        return True
+        return True, None
 
-    context.run_task("Map_MoveMainCityLeft")
-    context.run_task("Map_MoveMainCityRight")
+    frames = get_frames(context)
+    frames.run_task("Map_MoveMainCityLeft")
+    frames.run_task("Map_MoveMainCityRight")
 
-    context.run_task("OpenCityTaskPanel")
-    if context.run_recognition(
-        "InTaskPannel", context.tasker.controller.post_screencap().wait().get()
-    ).hit:
-        return _accept_new_task(context)
+    frames.run_task("OpenCityTaskPanel")
+    if frames.run_recognition("InTaskPannel").hit:
+        task = _accept_new_task(context)
+        return task is not None, task.task_name if task else None
     else:
-        return False
+        return False, None
+
+
+def _read_task_page(
+    context: Context, skip_names: Optional[Set[str]] = None
+) -> Tuple[List[TaskInfo], List]:
+    """
+    识别当前任务面板页面中可接取的任务
+
+    Args:
+        context: MAA 上下文对象
+        skip_names: 已识别过的任务名称，这些任务不再解析
+
+    Returns:
+        Tuple[List[TaskInfo], List]: 任务列表和页面的 OCR 结果
+    """
+    reco_detail = get_frames(context).run_recognition(
+        "GetCityTaskDetails",
+        pipeline_override={
+            "GetCityTaskDetails": {
+                "recognition": "OCR",
+                "expected": ["接受"],
+                "roi": TASK_PANEL_ROI,
+            }
+        },
+    )
+    if not reco_detail or not reco_detail.hit:
+        return [], []
+
+    extractor = get_task_extractor(TASK_PANEL_ROI)
+    tasks = extractor.extract_tasks(reco_detail.all_results, skip_names)
+    # 页面边界：一次写回本页新识别的任务名称
+    extractor.flush_task_names()
+    return tasks, reco_detail.all_results
+
+
+def _find_task(ocr_results: List, task_name: str) -> Optional[TaskInfo]:
+    """在已识别的页面 OCR 结果中查找任务，不重新截图和 OCR"""
+    for task in get_task_extractor(TASK_PANEL_ROI).extract_tasks(ocr_results):
+        if task.task_name == task_name:
+            return task
+    return None
+
+
+def _return_to_task(context: Context, task: TaskInfo, pages_back: int):
+    """
+    向上滑动回到任务所在页面，并重新定位该任务
+
+    Returns:
+        Optional[TaskInfo]: 当前画面中的该任务，未找到返回 None
+    """
+    frames = get_frames(context)
+    # 滑动距离不完全固定，多滑一次兜底
+    for _ in range(pages_back + 1):
+        before = frames.get()
+        frames.run_task("FindCityTask_SwipeUp")
+        wait_until_stable(
+            context,
+            "scroll_FindCityTask_SwipeUp",
+            timeout_ms=1000,
+            roi=TASK_PANEL_ROI,
+            min_ms=200,
+            before=before,
+        )
+        for current in _read_task_page(context)[0]:
+            if current.task_name == task.task_name:
+                return current
+    return None
 
 
-def _accept_new_task(context: Context) -> bool:
+def _accept_new_task(context: Context) -> Optional[TaskInfo]:
     """
     接取新任务
 
+    浏览任务列表的所有页面（或策略关闭全页浏览时到第一个有任务的页面），
+    按任务选择策略排序后接取得分最高的任务。
+
     Args:
         context: MAA 上下文对象
 
     Returns:
-        bool: 接取成功返回 True
+        Optional[TaskInfo]: 接取的任务，未接取返回 None
     """
+    frames = get_frames(context)
+    policy = load_task_policy()
     max_swipe_times = 3
-    swipe_count = 0
-
-    while swipe_count <= max_swipe_times:
-        reco_detail = context.run_recognition(
-            "GetCityTaskDetails",
-            context.tasker.controller.post_screencap().wait().get(),
-            pipeline_override={
-                "GetCityTaskDetails": {
-                    "recognition": "OCR",
-                    "expected": ["接受"],
-                    "roi": [15, 382, 697, 841],
-                }
-            },
+    scroller = ListScroller(
+        context, TASK_PANEL_ROI, "FindCityTask_SwipeDown", max_swipes=max_swipe_times
+    )
+    scroller.first_page()
+
+    # 任务名称 -> (首次出现的页码, 任务)，相邻页面重叠的任务在解析前跳过
+    candidates: Dict[str, Tuple[int, TaskInfo]] = {}
+    seen_texts = set()
+    page = 0
+    while True:
+        tasks, page_results = _read_task_page(context, set(candidates))
+        fingerprint = frozenset(result.text for result in page_results)
+        for task in tasks:
+            candidates[task.task_name] = (page, task)
+
+        if tasks and not policy.scan_all_pages:
+            break
+        # 页面上的文本都已见过，说明滑动没有露出新任务，后面也不会再有
+        if page > 0 and fingerprint <= seen_texts:
+            logger.info("滑动后没有新的任务，停止浏览任务列表")
+            break
+        seen_texts |= fingerprint
+        if scroller.swipes >= max_swipe_times:
+            break
+
+        logger.info(
+            f"正在滑动浏览任务列表... ({scroller.swipes + 1}/{max_swipe_times})"
         )
+        # 滑动后画面不再移动说明任务列表已到底部，无需再识别
+        if scroller.next_page() is None:
+            break
+        page += 1
 
-        tasks = []
-        if reco_detail.hit:
-            extractor = TaskExtractor(roi=[15, 382, 697, 841])
-            tasks = extractor.extract_tasks(reco_detail.all_results)
-
-        if tasks:
-            extractor.print_task_details([tasks[0]])
-            accept_task = tasks[0]
-            accept_task_rect = accept_task.accept_button_box
-            if accept_task_rect:
-                accept_task_rect_x, accept_task_rect_y = (
-                    accept_task_rect.x + accept_task_rect.w // 2,
-                    accept_task_rect.y + accept_task_rect.h // 2,
-                )
-                context.tasker.controller.post_click(
-                    accept_task_rect_x, accept_task_rect_y
-                ).wait()
-                time.sleep(0.5)
-            return True
-        else:
-            if swipe_count < max_swipe_times:
-                logger.info(
-                    f"当前页面任务全在黑名单或无任务，正在滑动刷新... ({swipe_count + 1}/{max_swipe_times})"
-                )
-                context.run_task("FindCityTask_SwipeDown")
-                swipe_count += 1
-            else:
-                logger.error("已尝试多次刷新，未检测到可接取的任务")
-                return False
+    if not candidates:
+        logger.error("任务全在黑名单或无任务，未检测到可接取的任务")
+        return None
 
-    return False
+    ranked = rank_tasks(
+        [task for _, task in candidates.values()], get_fight_stats(), policy
+    )
+    score, best = ranked[0]
+    best_page = candidates[best.task_name][0]
+    logger.info(
+        f"浏览 {page + 1} 页共 {len(candidates)} 个任务，"
+        f"选择 {best.task_name}（得分 {score:.1f}）"
+    )
+    get_task_extractor(TASK_PANEL_ROI).print_task_details([best])
+
+    if best_page != page:
+        # 相邻页面有重叠，之前页面的任务可能仍显示在当前画面中，此时不需要往回滑
+        visible = _find_task(page_results, best.task_name)
+        best = visible or _return_to_task(context, best, page - best_page)
+        if best is None:
+            logger.error("返回任务所在页面后未找到该任务")
+            return None
+
+    if best.accept_button_box:
+        before = frames.get()
+        frames.click_box(best.accept_button_box)
+        wait_until_stable(
+            context, "accept_task", timeout_ms=1500, min_ms=300, before=before
+        )
+    return best
 
 
-def _process_fight(context: Context) -> bool:
+def _process_fight(
+    context: Context,
+    fight_config: FightConfig = None,
+    task_name: Optional[str] = None,
+) -> Optional[FightResult]:
     """
     战斗阶段：寻找任务点并完成战斗
 
     Args:
         context: MAA 上下文对象
+        fight_config: 战斗循环配置（回合数、时间预算、轮询间隔）
+        task_name: 本次接取的任务名称，战斗结束后记录到战斗统计
 
     Returns:
-        bool: 战斗成功返回 True，失败返回 False
+        Optional[FightResult]: 战斗结果，未找到任务点时返回 None
     """
     logger.info("====== 战斗阶段 ======")
 
-    if not context.run_recognition(
-        "UI_TaskPannelPageClose",
-        context.tasker.controller.post_screencap().wait().get(),
-    ).hit:
-        context.run_task("UI_TaskPannelPageOpen")
+    frames = get_frames(context)
+    if not frames.run_recognition("UI_TaskPannelPageClose").hit:
+        frames.run_task("UI_TaskPannelPageOpen")
 
-    recoDetail = context.run_recognition(
-        "TaskQuickLocation",
-        context.tasker.controller.post_screencap().wait().get(),
-    )
+    recoDetail = frames.run_recognition("TaskQuickLocation")
     if not recoDetail or not recoDetail.hit:
-        return False
-
-    rect = recoDetail.best_result.box
-    rect_x, rect_y = rect[0] + rect[2] // 2, rect[1] + rect[3] // 2
-    context.tasker.controller.post_click(rect_x, rect_y).wait()
-    time.sleep(0.5)
-
-    context.run_task("TaskDetailOpen")
-    context.run_task("TaskDetailFight")
-
-    context.run_task("FightStart")
-    round_count = 0
-    while True:
-        img = context.tasker.controller.post_screencap().wait().get()
-        if context.tasker.stopping:
-            logger.info(f"\n战斗中，已停止")
-            break
-        if context.run_recognition("FightFail", img).hit:
-            context.run_task("FightFail")
-            logger.info("\n战斗失败")
-            break
-        if context.run_recognition("FightVictory", img).hit:
-            context.run_task("FightVictory")
-            logger.info(f"\n战斗胜利（{round_count}回合）")
-            break
+        return None
 
-        context.run_task("FightEndRound")
-        round_count += 1
-        print(f"\r[info]战斗中，当前{round_count}回合...", flush=True, end="")
+    before = frames.get()
+    frames.click_box(recoDetail.best_result.box)
+    # 地图平移结束前点击任务详情会点偏
+    wait_until_stable(
+        context, "task_quick_location", timeout_ms=3000, min_ms=500, before=before
+    )
 
-    logger.info(f"战斗结束，共{round_count}回合")
+    frames.run_task("TaskDetailOpen")
+    frames.run_task("TaskDetailFight")
+
+    frames.run_task("FightStart")
+    captures_before = frames.capture_count
+    result = run_fight_loop(context, fight_config)
+    if result.outcome == FightOutcome.STOPPED:
+        logger.info(f"\n战斗中，已停止")
+    elif result.outcome == FightOutcome.FAIL:
+        logger.info("\n战斗失败")
+    elif result.outcome == FightOutcome.VICTORY:
+        logger.info(f"\n战斗胜利（{result.rounds}回合）")
+
+    logger.info(
+        f"战斗结束，共{result.rounds}回合，耗时{result.elapsed:.1f}秒，"
+        f"轮询{result.polls}次，截图{frames.capture_count - captures_before}次"
+    )
+    if task_name and result.finished:
+        get_fight_stats().record(
+            task_name,
+            result.rounds,
+            result.outcome == FightOutcome.VICTORY,
+        )
 
-    # 检测升级技能
-    while context.run_recognition(
-        "FightResultLearnSkill",
-        context.tasker.controller.post_screencap().wait().get(),
-    ).hit:
-        context.run_task("FightResultLearnSkill")
+    # 超时或被停止时战斗没有结束，不进行结算
+    if not result.finished:
+        return result
+
+    # 检测升级技能，画面未变化时不重复 OCR
+    _learn_skill_gate.reset()
+    while _learn_skill_gate.run(
+        "learn_skill",
+        frames.get(),
+        lambda: frames.run_recognition("FightResultLearnSkill").hit,
+        LEARN_SKILL_ROI,
+    ):
+        frames.run_task("FightResultLearnSkill")
+    _learn_skill_gate.log_stats()
 
     # 检测是否有弹窗
-    if context.run_recognition(
-        "FightPopUp",
-        context.tasker.controller.post_screencap().wait().get(),
-    ).hit:
-        context.run_task("FightPopUp")
+    if frames.run_recognition("FightPopUp").hit:
+        frames.run_task("FightPopUp")
 
     # 结束确认
-    context.run_task("FightResultConfirm")
+    frames.run_task("FightResultConfirm")
+    frames.log_stats("战斗阶段")
 
-    return True
+    return result
@@ -0,0 +1,113 @@
+from typing import List, Optional, Tuple
+
+from maa.context import Context
+
+from utils import logger
+from action.common.month_detector import detect_month
+
+# 各月份节日
+FESTIVAL_NAMES = {
+    2: "祈灵日",
+    3: "启航节",
+    5: "春林节",
+    6: "铸魂节",
+    8: "丰收节",
+    10: "勇士节",
+    11: "亡人节",
+    12: "创元节",
+}
+
+
+class GameCalendar:
+    """
+    游戏内日历状态
+
+    由一次月份识别作为种子，之后每观察到一次月份切换就在内存中推进，
+    只在到达校验间隔或状态可疑时才重新从画面识别月份。
+    """
+
+    def __init__(self, verify_interval: int = 4):
+        """
+        Args:
+            verify_interval: 推进多少个月后重新从画面校验一次
+        """
+        self.verify_interval = verify_interval
+        self.month: Optional[int] = None
+        self._months_since_verify = 0
+        self.detect_count = 0
+
+    @property
+    def seeded(self) -> bool:
+        return self.month is not None
+
+    def sync(self, context: Context) -> Optional[int]:
+        """从画面识别月份并校准日历"""
+        self.detect_count += 1
+        match = detect_month(context)
+        if not match.ok:
+            logger.error("日历校准失败，未识别到当前月份")
+            self.month = None
+            return None
+
+        if self.seeded and match.month != self.month:
+            logger.warning(f"日历推算为{self.month}月，实际为{match.month}月，已校准")
+        self.month = match.month
+        self._months_since_verify = 0
+        return self.month
+
+    @property
+    def verified(self) -> bool:
+        """当前月份是否是本月从画面识别得到的，而不是推算的"""
+        return self.seeded and self._months_since_verify == 0
+
+    def current(self, context: Context, verify: bool = False) -> Optional[int]:
+        """
+        获取当前月份，未初始化或到达校验间隔时从画面识别
+
+        Args:
+            context: MAA 上下文对象
+            verify: 为 True 时，推算得到的月份也要从画面确认
+
+        Returns:
+            Optional[int]: 当前月份，识别失败返回 None
+        """
+        if (
+            not self.seeded
+            or self._months_since_verify >= self.verify_interval
+            or (verify and not self.verified)
+        ):
+            return self.sync(context)
+        return self.month
+
+    def advance(self):
+        """观察到月份切换，推进一个月"""
+        if not self.seeded:
+            return
+        self.month = self.month % 12 + 1
+        self._months_since_verify += 1
+
+    def invalidate(self):
+        """状态可疑，下次获取月份时重新识别"""
+        self.month = None
+
+    def expect(self, month: int):
+        """画面上出现了只属于某个月份的内容，与推算不符时标记为可疑"""
+        if self.seeded and self.month != month:
+            logger.warning(f"日历推算为{self.month}月，但检测到{month}月的内容")
+            self.invalidate()
+
+    def upcoming_festivals(self, months: int = 12) -> List[Tuple[int, str]]:
+        """
+        预测接下来若干个月（含本月）的节日
+
+        Returns:
+            List[Tuple[int, str]]: (月份, 节日名) 列表
+        """
+        if not self.seeded:
+            return []
+        festivals = []
+        for offset in range(months):
+            month = (self.month - 1 + offset) % 12 + 1
+            if month in FESTIVAL_NAMES:
+                festivals.append((month, FESTIVAL_NAMES[month]))
+        return festivals
@@ -0,0 +1,175 @@
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import re
+
+from utils import logger
+from action.zshg.task_extractor import TaskInfo
+
+# 任务选择策略配置
+TASK_POLICY_FILE = "config/task_policy.json"
+# 各任务的历史战斗统计
+FIGHT_STATS_FILE = "assets/task_fight_stats.json"
+
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def parse_number(text: Optional[str]) -> Optional[int]:
+    """取文本中的第一个整数，如 "3月" -> 3、"Lv.12" -> 12"""
+    if not text:
+        return None
+    match = _NUMBER_PATTERN.search(text)
+    return int(match.group()) if match else None
+
+
+def parse_reward(reward: Optional[str]) -> int:
+    """奖励总数，如 "x300 + 200" -> 500"""
+    if not reward:
+        return 0
+    return sum(int(value) for value in _NUMBER_PATTERN.findall(reward))
+
+
+@dataclass
+class TaskPolicy:
+    """
+    任务选择策略
+    """
+
+    # reward_per_round：按每回合期望奖励选择；first：接取第一个任务（旧行为）
+    strategy: str = "reward_per_round"
+    level_penalty: float = 0.0  # 每级敌人等级扣除的奖励
+    default_rounds: float = 5.0  # 没有历史记录时假定的战斗回合数
+    scan_all_pages: bool = True  # 是否浏览完所有页面再选择
+
+
+def load_task_policy() -> TaskPolicy:
+    """读取任务选择策略，文件不存在时使用默认配置（不写文件）"""
+    policy = TaskPolicy()
+    if not os.path.exists(TASK_POLICY_FILE):
+        return policy
+
+    try:
+        with open(TASK_POLICY_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        known = {f.name for f in fields(TaskPolicy)}
+        return TaskPolicy(**{k: v for k, v in data.items() if k in known})
+    except Exception:
+        logger.exception("读取任务选择策略失败，使用默认配置")
+        return policy
+
+
+def save_task_policy(policy: TaskPolicy):
+    """保存用户修改后的任务选择策略"""
+    try:
+        os.makedirs(os.path.dirname(TASK_POLICY_FILE), exist_ok=True)
+        tmp_path = f"{TASK_POLICY_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(policy), f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, TASK_POLICY_FILE)
+    except Exception:
+        logger.exception("写入任务选择策略失败")
+
+
+@dataclass
+class FightRecord:
+    fights: int = 0
+    wins: int = 0
+    rounds: int = 0  # 累计回合数
+
+    @property
+    def mean_rounds(self) -> float:
+        return self.rounds / self.fights if self.fights else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        """拉普拉斯平滑后的胜率，没有记录时为 0.5"""
+        return (self.wins + 1) / (self.fights + 2)
+
+
+class FightStats:
+    """
+    各任务的历史战斗统计，按任务名称记录战斗次数、胜场和回合数
+    """
+
+    def __init__(self, path: str = FIGHT_STATS_FILE):
+        self.path = path
+        self.records: Dict[str, FightRecord] = {}
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    for name, record in json.load(f).items():
+                        self.records[name] = FightRecord(**record)
+        except Exception:
+            logger.exception(f"读取战斗统计失败: {path}")
+
+    def get(self, name: str) -> Optional[FightRecord]:
+        return self.records.get(name)
+
+    def record(self, name: str, rounds: int, victory: bool):
+        record = self.records.setdefault(name, FightRecord())
+        record.fights += 1
+        record.wins += int(victory)
+        record.rounds += rounds
+        self._save()
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            data = {name: asdict(self.records[name]) for name in sorted(self.records)}
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            logger.exception(f"保存战斗统计失败: {self.path}")
+
+
+_fight_stats: Optional[FightStats] = None
+
+
+def get_fight_stats() -> FightStats:
+    global _fight_stats
+    if _fight_stats is None:
+        _fight_stats = FightStats()
+    return _fight_stats
+
+
+def score_task(task: TaskInfo, stats: FightStats, policy: TaskPolicy) -> float:
+    """
+    任务得分：每回合期望奖励
+
+    (奖励 - 敌人等级惩罚) × 历史胜率 / 平均回合数，没有历史记录时使用默认回合数和 0.5 胜率。
+    惩罚后的奖励不低于 0，否则胜率越低得分反而越高。
+    """
+    value = parse_reward(task.reward)
+    value -= policy.level_penalty * (parse_number(task.enemy_level) or 0)
+    value = max(value, 0.0)
+
+    record = stats.get(task.task_name)
+    if record and record.fights:
+        rounds = max(record.mean_rounds, 1.0)
+        win_rate = record.win_rate
+    else:
+        rounds = max(policy.default_rounds, 1.0)
+        win_rate = FightRecord().win_rate
+    return value * win_rate / rounds
+
+
+def rank_tasks(
+    tasks: List[TaskInfo], stats: FightStats, policy: TaskPolicy
+) -> List[Tuple[float, TaskInfo]]:
+    """
+    按策略为任务排序，得分相同时保持原有（页面）顺序
+
+    Returns:
+        List[Tuple[float, TaskInfo]]: (得分, 任务)，得分从高到低
+    """
+    if policy.strategy == "first":
+        return [(0.0, task) for task in tasks]
+    if policy.strategy != "reward_per_round":
+        logger.warning(f"未知的任务选择策略 {policy.strategy}，按页面顺序选择")
+        return [(0.0, task) for task in tasks]
+
+    scored = [(score_task(task, stats, policy), task) for task in tasks]
+    return sorted(scored, key=lambda item: item[0], reverse=True)
@@ -1,11 +1,25 @@
-from dataclasses import dataclass
-from maa.agent.agent_server import AgentServer
+from dataclasses import replace
+from typing import Dict, Optional, Tuple
 from maa.context import Context
 from maa.custom_action import CustomAction
 from utils import logger
+from action.common.action_registry import custom_action
+from action.common.frame_provider import get_frames
+from action.common.list_scroller import ListScroller
+from action.common.lru_cache import LRUCache
+from action.zshg.child_model import (
+    ATTRIBUTE_GROWTH_RANGES,
+    ATTRIBUTE_RANK,
+    Bloodline,
+    Feature,
+    ParentInfo,
+    Potential,
+    generate_child_name,
+    get_attribute_grade,
+)
+from action.zshg.child_roster import ChildRecord, get_child_roster, portrait_hash
 
 import re
-import time
 
 # 血脉面板识别配置
 BLOODLINE_CONFIG = {
@@ -18,93 +32,18 @@ BLOODLINE_CONFIG = {
     "percent_height_reduction": 50,  # 减去一些余量
 }
 
-# 修正后的属性成长区间表（基于原描述）
-ATTRIBUTE_GROWTH_RANGES = {
-    "E": (-float("inf"), 0.10),
-    "D": (0.10, 0.20),
-    "C": (0.20, 0.35),
-    "B": (0.35, 0.55),
-    "A": (0.55, 0.74),
-    "S": (0.74, 0.93),
-    "SS": (0.93, float("inf")),
-}
-
-# 属性等级优先级（用于排序）
-ATTRIBUTE_RANK = {
-    "SS": 7,
-    "S": 6,
-    "A": 5,
-    "B": 4,
-    "C": 3,
-    "D": 2,
-    "E": 1,
+# 父母信息卡区域，与 PannelFatherTitle / PannelMotherTitle 的 roi 一致
+PARENT_CARD_ROI = {
+    True: [13, 340, 227, 152],
+    False: [497, 330, 211, 154],
 }
+# 父母信息卡指纹边长，比子孙头像哈希更细，以区分姓名文字
+PARENT_CARD_HASH_SIZE = 16
+# 缓存的父母信息卡数量，常见的几对父母足够
+PARENT_CACHE_SIZE = 32
 
-
-def get_attribute_grade(value: float) -> str:
-    """
-    根据属性值返回等级（E, D, C, B, A, S, SS）
-    """
-    for grade, (min_val, max_val) in ATTRIBUTE_GROWTH_RANGES.items():
-        if min_val <= value < max_val:
-            return grade
-    return "E"
-
-
-def generate_child_name(
-    potential,
-    bloodline,
-    features: list,
-    highest_title: str,
-) -> str:
-    """
-    生成子孙命名
-    格式：最高属性 + 次高属性 + 特性 + 爵位
-    例如：力 ss 技 ss 太科公.2
-    """
-    # 1. 找出最高和次高属性
-    attributes = []
-    for attr_name, attr_value in potential.values.items():
-        grade = get_attribute_grade(attr_value)
-        attributes.append((attr_name, attr_value, grade))
-
-    # 按属性值排序
-    attributes.sort(key=lambda x: x[1], reverse=True)
-
-    # 获取最高和次高属性
-    if len(attributes) >= 2:
-        top_attr = attributes[0]
-        second_attr = attributes[1]
-
-        # 属性名称取第一个汉字
-        top_attr_short = top_attr[0][0]  # 如"力"
-        second_attr_short = second_attr[0][0]  # 如"技"
-
-        # 等级转小写
-        top_grade = top_attr[2].lower()  # 如"ss"
-        second_grade = second_attr[2].lower()  # 如"ss"
-
-        attr_part = f"{top_attr_short}{top_grade}{second_attr_short}{second_grade}"
-    else:
-        attr_part = ""
-
-    # 2. 提取特性（跳过隐藏特性）
-    feature_chars = []
-    for feature in features:
-        if "隐藏" not in feature.name:
-            # 取特性名称第一个汉字
-            feature_chars.append(feature.name[0])
-
-    feature_part = "".join(feature_chars[:3])  # 最多取 3 个特性
-
-    # 3. 爵位取第一个汉字
-    title_short = highest_title[0] if highest_title else ""
-
-    # 4. 组合命名
-    name = f"{attr_part}{feature_part}{title_short}"
-
-    return name
-
+# 父母信息卡指纹 -> 解析结果
+_parent_cache = LRUCache("父母信息", PARENT_CACHE_SIZE)
 
 # 天赋面板相对坐标
 PanelPropertyTable = {
@@ -151,61 +90,130 @@ ATTRIBUTE_COLORS = {
 }
 
 
-@dataclass
-class Potential:
-    """
-    潜力结构体，用于存储子项的六维属性
-    """
+# 含有这些字符的文本不是特性名称
+FEATURE_NAME_EXCLUDE = ["的", "了", "后", "一", "能", "+", "%", "，", "。"]
 
-    values: dict = None  # 属性名 -> 数值，如 {"力量": -0.1874, "体质": 0.1811}
 
-    def __post_init__(self):
-        if self.values is None:
-            self.values = {
-                "力量": 0.0,
-                "体质": 0.0,
-                "技巧": 0.0,
-                "感知": 0.0,
-                "敏捷": 0.0,
-                "意志": 0.0,
-            }
+def is_feature_name(text: str) -> bool:
+    """特性名称：通常是 4-8 个汉字的短语"""
+    return (
+        all("\u4e00" <= c <= "\u9fff" or c in "·" for c in text)
+        and 2 <= len(text) <= 10
+        and not any(keyword in text for keyword in FEATURE_NAME_EXCLUDE)
+    )
 
 
-@dataclass
-class Bloodline:
+def parse_feature_lines(
+    ocr_results: list, features: Dict[str, Feature], current: Optional[Feature] = None
+) -> Optional[Feature]:
     """
-    血脉结构体，用于存储子项的血统信息
+    解析一段特性列表的 OCR 结果，按名称合并到 features
+
+    滚动后新条带开头的描述属于上一页最后一个特性，因此传入并返回当前特性；
+    条带之间有重叠，已存在的名称和描述不会重复添加。
+
+    Args:
+        ocr_results: 按 Vertical 排序的 OCR 结果
+        features: 特性名 -> 特性
+        current: 上一段结束时正在解析的特性
+
+    Returns:
+        Optional[Feature]: 本段结束时正在解析的特性
     """
+    for item in ocr_results:
+        text = item.text.strip()
 
-    bloodlines: dict = None  # 血统名 -> 百分比，如 {"瓦诺遗族": 80, "高阶精灵": 20}
+        # 跳过锚点文本
+        if text == "特性":
+            continue
 
-    def __post_init__(self):
-        if self.bloodlines is None:
-            self.bloodlines = {}
+        if is_feature_name(text):
+            current = features.setdefault(text, Feature(name=text))
+        elif current and text not in current.description:
+            # 特性描述
+            current.description += text
+    return current
 
 
-@dataclass
-class Feature:
-    """
-    特性结构体，用于存储子项的特性信息
-    """
+# 天赋面板单项识别框尺寸 [w, h]
+PANEL_PROPERTY_CELL = [120, 35]
+
+# 属性值文本，如 "-0.1874"
+PROPERTY_VALUE_PATTERN = re.compile(r"-?\d+\.\d+")
 
-    name: str = ""  # 特性名称
-    description: str = ""  # 特性描述
 
+def panel_property_region(anchor_box) -> list:
+    """
+    计算覆盖六项属性名称和数值的识别区域
+
+    Args:
+        anchor_box: PanelPropertyInit 锚点边界框 [x, y, w, h]
 
-@dataclass
-class ParentInfo:
+    Returns:
+        list: 识别区域 [x, y, w, h]
     """
-    父母信息结构体
+    cell_w, cell_h = PANEL_PROPERTY_CELL
+    offsets = [
+        offset
+        for item in PanelPropertyTable.values()
+        for offset in (item["attr_offset"], item["val_offset"])
+    ]
+    left = min(x for x, _ in offsets)
+    top = min(y for _, y in offsets)
+    right = max(x for x, _ in offsets) + cell_w
+    bottom = max(y for _, y in offsets) + cell_h
+    return [anchor_box[0] + left, anchor_box[1] + top, right - left, bottom - top]
+
+
+def _in_cell(box, anchor_box, offset) -> bool:
+    """判断 OCR 结果中心是否落在相对锚点偏移 offset 的识别框内"""
+    cx = box[0] + box[2] // 2 - anchor_box[0]
+    cy = box[1] + box[3] // 2 - anchor_box[1]
+    return (
+        offset[0] <= cx <= offset[0] + PANEL_PROPERTY_CELL[0]
+        and offset[1] <= cy <= offset[1] + PANEL_PROPERTY_CELL[1]
+    )
+
+
+def parse_property_panel(ocr_results: list, anchor_box) -> Potential:
     """
+    按天赋面板布局把整块区域的 OCR 结果分配到六项属性
 
-    name: str = ""  # 姓名
-    title: str = ""  # 爵位（男爵、伯爵、公爵、骑士、无爵位）
-    mercenary_group: str = ""  # 佣兵团
+    属性名称框中需识别到属性全称或首字，属性值框中需识别到数值，两者都满足才记录该属性。
 
+    Args:
+        ocr_results: 属性区域的 OCR 结果
+        anchor_box: PanelPropertyInit 锚点边界框 [x, y, w, h]
 
-@AgentServer.custom_action("ChildRec")
+    Returns:
+        Potential: 识别到的潜力
+    """
+    potential = Potential()
+    for attr_name, offsets in PanelPropertyTable.items():
+        name_found = False
+        value = None
+        value_score = -1.0
+        for item in ocr_results:
+            text = item.text.strip()
+            if not text:
+                continue
+            if _in_cell(item.box, anchor_box, offsets["attr_offset"]):
+                if attr_name in text or attr_name[0] in text:
+                    name_found = True
+            elif _in_cell(item.box, anchor_box, offsets["val_offset"]):
+                match = PROPERTY_VALUE_PATTERN.search(text)
+                if match and item.score > value_score:
+                    value = float(match.group())
+                    value_score = item.score
+
+        if name_found and value is not None:
+            potential.values[attr_name] = value
+        else:
+            logger.warning(f"未识别到属性：{attr_name}")
+    return potential
+
+
+@custom_action("ChildRec")
 class ChildRec(CustomAction):
     """
     识别子项信息
@@ -227,6 +235,7 @@ class ChildRec(CustomAction):
             context: MAA 上下文
             is_father: True 为父亲，False 为母亲
         """
+        frames = get_frames(context)
         parent_info = ParentInfo()
 
         # 选择识别任务
@@ -234,10 +243,7 @@ class ChildRec(CustomAction):
         parent_type = "父亲" if is_father else "母亲"
 
         # 识别父母信息
-        reco_result = context.run_recognition(
-            title_task,
-            context.tasker.controller.post_screencap().wait().get(),
-        )
+        reco_result = frames.run_recognition(title_task)
 
         if not reco_result.hit:
             logger.error(f"识别{parent_type}信息失败")
@@ -295,6 +301,31 @@ class ChildRec(CustomAction):
 
         return parent_info
 
+    def extract_parents(self, context: Context) -> Tuple[ParentInfo, ParentInfo]:
+        """
+        在同一帧上读取父母信息卡
+
+        按信息卡的画面指纹查询缓存，同一对父母再次生娃时只需一次截图、不再 OCR
+        Returns:
+            (父亲信息，母亲信息)
+        """
+        image = get_frames(context).get()
+        parents = []
+        for is_father in (True, False):
+            key = (
+                is_father,
+                portrait_hash(image, PARENT_CARD_ROI[is_father], PARENT_CARD_HASH_SIZE),
+            )
+            parent_info = _parent_cache.get(key)
+            if parent_info is None:
+                parent_info = self.extract_parent_info(context, is_father)
+                # 没有识别到姓名时不缓存，下次重新识别
+                if parent_info.name:
+                    _parent_cache.put(key, parent_info)
+            parents.append(replace(parent_info))
+        _parent_cache.log_stats()
+        return parents[0], parents[1]
+
     def compare_parent_titles(
         self, father_info: ParentInfo, mother_info: ParentInfo
     ) -> tuple:
@@ -324,81 +355,46 @@ class ChildRec(CustomAction):
     def extract_attributes(self, context: Context) -> bool:
         """
         提取子项属性
+
+        一次截图、一次 OCR 读取整个天赋面板，再按相对锚点的布局分配六项属性
         """
+        frames = get_frames(context)
+
         # 2.1 初始化天赋面板锚点位置
-        AnChorRect = {}
-        RecoDetail = context.run_recognition(
-            "PanelPropertyInit", context.tasker.controller.post_screencap().wait().get()
-        )
+        RecoDetail = frames.run_recognition("PanelPropertyInit")
         if RecoDetail.hit:
-            # logger.info("初始化天赋面板锚点位置成功")
             AnChorRect = RecoDetail.box  # 获取锚点的边界框 [x, y, width, height]
         else:
             logger.error("初始化天赋面板锚点位置失败")
             return False
 
-        # 2.2 根据天赋面板锚点位置识别子项属性
-        result_attributes: Potential = Potential()  # 用于存储最终结果
-        for attr_name, offsets in PanelPropertyTable.items():
-            # 计算属性文本和其对应值的精确坐标
-            anchor_x, anchor_y = AnChorRect[0], AnChorRect[1]
-
-            # 属性文本的坐标 (左上角)
-            attr_x = anchor_x + offsets["attr_offset"][0]
-            attr_y = anchor_y + offsets["attr_offset"][1]
-
-            # 属性值的坐标 (左上角)
-            val_x = anchor_x + offsets["val_offset"][0]
-            val_y = anchor_y + offsets["val_offset"][1]
-
-            # 定义裁剪区域 (roi) [x, y, width, height]
-            attr_roi = [attr_x, attr_y, 120, 35]  # 属性文本的识别区域
-            val_roi = [val_x, val_y, 120, 35]  # 属性值的识别区域
-
-            # 运行识别任务，并传入裁剪区域
-            reco_attr = context.run_recognition(
-                "PanelPropertyItemCheck",
-                context.tasker.controller.post_screencap().wait().get(),
-                pipeline_override={
-                    "PanelPropertyItemCheck": {
-                        "expected": [attr_name, attr_name[0]],  # 匹配属性全称或第一个字
-                        "roi": attr_roi,
-                    }
-                },
-            )
-
-            reco_val = context.run_recognition(
-                "PanelPropertyNumCheck",
-                context.tasker.controller.post_screencap().wait().get(),
-                pipeline_override={"PanelPropertyNumCheck": {"roi": val_roi}},
-            )
-
-            # 检查结果并存储
-            if reco_attr.hit and reco_val.hit:
-                # 提取纯属性名（去掉等级 A,B,C,D,E,S）
-                clean_attr_name = re.sub(
-                    r"[A-E S]", "", reco_attr.best_result.text
-                ).strip()
+        # 2.2 在同一帧上一次识别整个属性区域
+        reco_panel = frames.run_recognition(
+            "PanelPropertyRegionCheck",
+            pipeline_override={
+                "PanelPropertyRegionCheck": {"roi": panel_property_region(AnChorRect)}
+            },
+        )
+        if not reco_panel or not reco_panel.hit:
+            logger.error("识别天赋面板失败")
+            return False
 
-                # 存储结果
-                result_attributes.values[clean_attr_name] = float(
-                    reco_val.best_result.text
-                )
-        print(result_attributes)
+        # 2.3 根据天赋面板锚点位置分配子项属性
+        result_attributes = parse_property_panel(reco_panel.all_results, AnChorRect)
+        logger.debug(f"天赋属性识别结果：{result_attributes.values}")
         # 保存潜力对象
         self.potential = result_attributes
-        # 5. 返回成功结果，并附上解析出的数据
         return True
 
     def extract_bloodlines(self, context: Context) -> bool:
         """
         提取子项血脉信息
         """
+        frames = get_frames(context)
+
         # 3.1 初始化血脉面板锚点位置
         blood_anchor_rect = None
-        reco_blood = context.run_recognition(
-            "PanelBloodInit", context.tasker.controller.post_screencap().wait().get()
-        )
+        reco_blood = frames.run_recognition("PanelBloodInit")
         if reco_blood.hit:
             blood_anchor_rect = reco_blood.box
         else:
@@ -407,9 +403,7 @@ class ChildRec(CustomAction):
 
         # 3.2 初始化特性面板锚点位置（用于计算血脉区域高度）
         feature_anchor_rect = None
-        reco_feature = context.run_recognition(
-            "PanelFeatureInit", context.tasker.controller.post_screencap().wait().get()
-        )
+        reco_feature = frames.run_recognition("PanelFeatureInit")
         if reco_feature.hit:
             feature_anchor_rect = reco_feature.box
         else:
@@ -440,16 +434,14 @@ class ChildRec(CustomAction):
         ]
 
         # 3.6 识别血脉名称
-        reco_names = context.run_recognition(
+        reco_names = frames.run_recognition(
             "PanelBloodNameCheck",
-            context.tasker.controller.post_screencap().wait().get(),
             pipeline_override={"PanelBloodNameCheck": {"roi": name_roi}},
         )
 
         # 3.7 识别血脉浓度
-        reco_percents = context.run_recognition(
+        reco_percents = frames.run_recognition(
             "PanelBloodPercentCheck",
-            context.tasker.controller.post_screencap().wait().get(),
             pipeline_override={"PanelBloodPercentCheck": {"roi": percent_roi}},
         )
 
@@ -498,11 +490,11 @@ class ChildRec(CustomAction):
         """
         提取子项特性信息
         """
+        frames = get_frames(context)
+
         # 4.1 初始化特性面板锚点位置
         feature_anchor_rect = None
-        reco_feature = context.run_recognition(
-            "PanelFeatureInit", context.tasker.controller.post_screencap().wait().get()
-        )
+        reco_feature = frames.run_recognition("PanelFeatureInit")
         if reco_feature.hit:
             feature_anchor_rect = reco_feature.box
         else:
@@ -515,105 +507,36 @@ class ChildRec(CustomAction):
         )
 
         # 4.2 定义特性识别区域
-        feature_roi_first = [
+        feature_roi = [
             feature_anchor_x,
             feature_anchor_y + feature_anchor_rect[3],
             600,
             500,
         ]
 
-        # 4.3 循环识别特性，直到连续两次下滑没有找到新特性
-        all_features: list[Feature] = []
-        consecutive_failures = 0
-        max_consecutive_failures = 2
-        swipe_count = 0
-
-        while consecutive_failures < max_consecutive_failures:
-            # 第一次使用动态 ROI，第二次及以后使用固定 ROI
-            feature_roi = feature_roi_first
-
-            # 识别当前页面的特性
-            reco_features = context.run_recognition(
+        # 4.3 滚动读取特性列表：首屏识别整个区域，之后只识别新露出的条带，
+        # 滑动后画面不再移动即到达底部
+        features: Dict[str, Feature] = {}
+        current_feature = None
+        scroller = ListScroller(context, feature_roi, "PropertyPanelSwipeDown")
+        roi = scroller.first_page()
+        while roi is not None:
+            reco_features = frames.run_recognition(
                 "PanelFeatureCheck",
-                context.tasker.controller.post_screencap().wait().get(),
-                pipeline_override={"PanelFeatureCheck": {"roi": feature_roi}},
+                pipeline_override={"PanelFeatureCheck": {"roi": roi}},
             )
+            if reco_features and reco_features.hit:
+                filtered_results = [
+                    item
+                    for item in reco_features.all_results
+                    if item.score > 0.9 and item.text.strip()
+                ]
+                current_feature = parse_feature_lines(
+                    filtered_results, features, current_feature
+                )
+            roi = scroller.next_page()
 
-            if not reco_features.hit:
-                consecutive_failures += 1
-                continue
-
-            # 解析 OCR 结果
-            ocr_results = reco_features.all_results
-            filtered_results = [
-                item for item in ocr_results if item.score > 0.9 and item.text.strip()
-            ]
-
-            # 提取特性名称和描述
-            page_features = []
-            current_feature_name = None
-
-            for item in filtered_results:
-                text = item.text.strip()
-                box_y = item.box[1]
-
-                # 跳过锚点文本
-                if text == "特性":
-                    continue
-
-                # 特性名称：通常是 4-8 个汉字的短语
-                if (
-                    all("\u4e00" <= c <= "\u9fff" or c in "·" for c in text)
-                    and 2 <= len(text) <= 10
-                    and not any(
-                        keyword in text
-                        for keyword in [
-                            "的",
-                            "了",
-                            "后",
-                            "一",
-                            "能",
-                            "+",
-                            "%",
-                            "，",
-                            "。",
-                        ]
-                    )
-                ):
-                    # 新特性名称
-                    if current_feature_name:
-                        page_features.append(current_feature_name)
-                    current_feature_name = Feature(name=text)
-                elif current_feature_name:
-                    # 特性描述
-                    current_feature_name.description += text
-
-            if current_feature_name:
-                page_features.append(current_feature_name)
-
-            # 检查是否有新特性
-            new_features_count = 0
-            for feature in page_features:
-                # 检查是否已存在
-                is_new = True
-                for existing in all_features:
-                    if existing.name == feature.name:
-                        is_new = False
-                        break
-                if is_new:
-                    all_features.append(feature)
-                    new_features_count += 1
-
-            if new_features_count == 0:
-                consecutive_failures += 1
-            else:
-                consecutive_failures = 0
-
-                # 下滑页面
-                context.run_task("PropertyPanelSwipeDown")
-                time.sleep(0.5)
-                swipe_count += 1
-
+        all_features = list(features.values())
         logger.info(
             f"特性识别完成，共识别到 {len(all_features)} 个特性 {[f.name for f in all_features]}"
         )
@@ -625,22 +548,25 @@ class ChildRec(CustomAction):
         self, context: Context, argv: CustomAction.RunArg
     ) -> CustomAction.RunResult:
         # 0.佣兵生娃
+        frames = get_frames(context)
+
+        roster = get_child_roster()
+        phash = portrait_hash(frames.get())
 
         # 1.识别父母信息
-        father_info = self.extract_parent_info(context, is_father=True)
-        mother_info = self.extract_parent_info(context, is_father=False)
+        father_info, mother_info = self.extract_parents(context)
 
         highest_title, count = self.compare_parent_titles(father_info, mother_info)
         logger.info(f"最高爵位是{highest_title}，最高爵位有{count}个")
 
         # 2.提取天赋属性
-        context.run_task("PannelChildInfoButton")
+        frames.run_task("PannelChildInfoButton")
         if not self.extract_attributes(context):
             logger.error("提取子项属性失败")
             return CustomAction.RunResult(success=False)
 
         # 3. 提取血脉信息
-        context.run_task("PropertyPanelSwipeDown")
+        frames.run_task("PropertyPanelSwipeDown")
         if not self.extract_bloodlines(context):
             logger.error("提取血脉信息失败")
             return CustomAction.RunResult(success=False)
@@ -651,18 +577,38 @@ class ChildRec(CustomAction):
             logger.warning("未识别到任何特性")
 
         # 5. 生成子孙命名
-        # 注意：这里需要在 extract_attributes 中保存 potential 对象
-        # 暂时使用空对象作为示例
         child_name = generate_child_name(
             self.potential, self.bloodline, features, highest_title
         )
         logger.info(f"子孙命名：{child_name}")
 
+        # 写入花名册，供批量改名等离线功能使用。婴儿头像多为共用立绘，每次生娃都新增一条记录
+        if roster is not None:
+            try:
+                roster.save(
+                    ChildRecord(
+                        phash=phash,
+                        name=child_name,
+                        highest_title=highest_title,
+                        potential=self.potential,
+                        bloodline=self.bloodline,
+                        features=features,
+                        father=father_info,
+                        mother=mother_info,
+                    )
+                )
+            except Exception:
+                logger.exception("写入子孙花名册失败")
+
         # 6. 输入子孙命名
-        context.run_task("BackButton_500ms")
-        context.run_task(
+        frames.run_task("BackButton_500ms")
+        self.set_child_name(context, child_name)
+
+        return CustomAction.RunResult(success=True)
+
+    def set_child_name(self, context: Context, child_name: str):
+        """在生娃事件界面输入子孙命名"""
+        get_frames(context).run_task(
             "PannelChildSetName",
             pipeline_override={"PannelChildSetNameCopy": {"input_text": child_name}},
         )
-
-        return CustomAction.RunResult(success=True)
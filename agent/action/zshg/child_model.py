@@ -0,0 +1,230 @@
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy
+
+# 子孙数据模型：属性等级、命名规则与识别结果结构体，供识别动作和花名册共用
+
+# 六维属性名称，与 Potential 默认值的顺序一致，也是批量接口中矩阵各列的顺序
+ATTRIBUTE_NAMES = ("力量", "体质", "技巧", "感知", "敏捷", "意志")
+
+# 修正后的属性成长区间表（基于原描述）
+ATTRIBUTE_GROWTH_RANGES = {
+    "E": (-float("inf"), 0.10),
+    "D": (0.10, 0.20),
+    "C": (0.20, 0.35),
+    "B": (0.35, 0.55),
+    "A": (0.55, 0.74),
+    "S": (0.74, 0.93),
+    "SS": (0.93, float("inf")),
+}
+
+# 属性等级优先级（用于排序）
+ATTRIBUTE_RANK = {
+    "SS": 7,
+    "S": 6,
+    "A": 5,
+    "B": 4,
+    "C": 3,
+    "D": 2,
+    "E": 1,
+}
+
+
+def get_attribute_grade(value: float) -> str:
+    """
+    根据属性值返回等级（E, D, C, B, A, S, SS）
+    """
+    for grade, (min_val, max_val) in ATTRIBUTE_GROWTH_RANGES.items():
+        if min_val <= value < max_val:
+            return grade
+    return "E"
+
+
+def generate_child_name(
+    potential,
+    bloodline,
+    features: list,
+    highest_title: str,
+) -> str:
+    """
+    生成子孙命名
+    格式：最高属性 + 次高属性 + 特性 + 爵位
+    例如：力 ss 技 ss 太科公.2
+    """
+    # 1. 找出最高和次高属性
+    attributes = []
+    for attr_name, attr_value in potential.values.items():
+        grade = get_attribute_grade(attr_value)
+        attributes.append((attr_name, attr_value, grade))
+
+    # 按属性值排序
+    attributes.sort(key=lambda x: x[1], reverse=True)
+
+    # 获取最高和次高属性
+    if len(attributes) >= 2:
+        top_attr = attributes[0]
+        second_attr = attributes[1]
+
+        # 属性名称取第一个汉字
+        top_attr_short = top_attr[0][0]  # 如"力"
+        second_attr_short = second_attr[0][0]  # 如"技"
+
+        # 等级转小写
+        top_grade = top_attr[2].lower()  # 如"ss"
+        second_grade = second_attr[2].lower()  # 如"ss"
+
+        attr_part = f"{top_attr_short}{top_grade}{second_attr_short}{second_grade}"
+    else:
+        attr_part = ""
+
+    # 2. 拼接特性和爵位，组合命名
+    name = f"{attr_part}{_name_suffix(features, highest_title)}"
+
+    return name
+
+
+def _name_suffix(features: list, highest_title: str) -> str:
+    """命名中属性之后的部分：特性 + 爵位"""
+    # 提取特性（跳过隐藏特性）
+    feature_chars = []
+    for feature in features:
+        if "隐藏" not in feature.name:
+            # 取特性名称第一个汉字
+            feature_chars.append(feature.name[0])
+
+    feature_part = "".join(feature_chars[:3])  # 最多取 3 个特性
+
+    # 爵位取第一个汉字
+    title_short = highest_title[0] if highest_title else ""
+
+    return f"{feature_part}{title_short}"
+
+
+# 批量评级：各等级名称及其区间下限（区间首尾相接，按下限升序）
+GRADE_NAMES = numpy.array(list(ATTRIBUTE_GROWTH_RANGES))
+_GRADE_LOWER = numpy.array([low for low, _ in ATTRIBUTE_GROWTH_RANGES.values()])
+_GRADE_UPPER = max(high for _, high in ATTRIBUTE_GROWTH_RANGES.values())
+# 不在任何区间内时的等级，与 get_attribute_grade 一致
+_FALLBACK_GRADE = list(ATTRIBUTE_GROWTH_RANGES).index("E")
+
+
+def grade_indices(values) -> numpy.ndarray:
+    """
+    批量评级，返回 GRADE_NAMES 中的下标，与逐个调用 get_attribute_grade 结果一致
+
+    用 searchsorted 在区间下限中定位；不在任何区间内的值（inf、nan）与标量版一样评为 E。
+
+    Args:
+        values: 任意形状的属性值数组
+
+    Returns:
+        numpy.ndarray: 与 values 形状相同的下标数组
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    index = numpy.searchsorted(_GRADE_LOWER, values, side="right") - 1
+    inside = (values >= _GRADE_LOWER[0]) & (values < _GRADE_UPPER)
+    return numpy.where(inside, index, _FALLBACK_GRADE)
+
+
+def grade_matrix(values) -> numpy.ndarray:
+    """批量评级，返回与 values 形状相同的等级名称数组"""
+    return GRADE_NAMES[grade_indices(values)]
+
+
+def potential_matrix(
+    potentials: Sequence["Potential"], attr_names: Sequence[str] = ATTRIBUTE_NAMES
+) -> numpy.ndarray:
+    """把潜力列表转为 (子孙数, 属性数) 矩阵，列顺序为 attr_names"""
+    return numpy.array(
+        [[potential.values[name] for name in attr_names] for potential in potentials],
+        dtype=numpy.float64,
+    ).reshape(len(potentials), len(attr_names))
+
+
+def generate_child_names(
+    values,
+    features_list: Sequence[list],
+    highest_titles: Sequence[str],
+    attr_names: Sequence[str] = ATTRIBUTE_NAMES,
+) -> List[str]:
+    """
+    批量生成子孙命名，与逐个调用 generate_child_name 结果一致
+
+    对整个属性矩阵一次评级、一次排序取最高和次高属性；
+    稳定排序，数值相同时按列顺序（即潜力字典的顺序）取前者。
+
+    Args:
+        values: (子孙数, 属性数) 属性矩阵，见 potential_matrix
+        features_list: 每个子孙的特性列表
+        highest_titles: 每个子孙父母的最高爵位
+        attr_names: 矩阵各列对应的属性名称
+
+    Returns:
+        List[str]: 子孙命名
+    """
+    values = numpy.asarray(values, dtype=numpy.float64).reshape(-1, len(attr_names))
+    if len(attr_names) >= 2:
+        order = numpy.argsort(-values, axis=1, kind="stable")[:, :2]
+        grades = numpy.char.lower(
+            grade_matrix(numpy.take_along_axis(values, order, axis=1))
+        )
+        shorts = numpy.array([name[0] for name in attr_names])[order]
+        attr_parts = [
+            f"{short[0]}{grade[0]}{short[1]}{grade[1]}"
+            for short, grade in zip(shorts.tolist(), grades.tolist())
+        ]
+    else:
+        attr_parts = [""] * len(values)
+
+    return [
+        f"{attr_part}{_name_suffix(features, title)}"
+        for attr_part, features, title in zip(attr_parts, features_list, highest_titles)
+    ]
+
+
+@dataclass
+class Potential:
+    """
+    潜力结构体，用于存储子项的六维属性
+    """
+
+    values: dict = None  # 属性名 -> 数值，如 {"力量": -0.1874, "体质": 0.1811}
+
+    def __post_init__(self):
+        if self.values is None:
+            self.values = {name: 0.0 for name in ATTRIBUTE_NAMES}
+
+
+@dataclass
+class Bloodline:
+    """
+    血脉结构体，用于存储子项的血统信息
+    """
+
+    bloodlines: dict = None  # 血统名 -> 百分比，如 {"瓦诺遗族": 80, "高阶精灵": 20}
+
+    def __post_init__(self):
+        if self.bloodlines is None:
+            self.bloodlines = {}
+
+
+@dataclass
+class Feature:
+    """
+    特性结构体，用于存储子项的特性信息
+    """
+
+    name: str = ""  # 特性名称
+    description: str = ""  # 特性描述
+
+
+@dataclass
+class ParentInfo:
+    """
+    父母信息结构体
+    """
+
+    name: str = ""  # 姓名
+    title: str = ""  # 爵位（男爵、伯爵、公爵、骑士、无爵位）
+    mercenary_group: str = ""  # 佣兵团
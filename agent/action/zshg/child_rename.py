@@ -0,0 +1,364 @@
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import List, Optional, Set, Tuple
+
+from maa.context import Context
+from maa.custom_action import CustomAction
+
+from utils import logger
+from action.common.action_registry import custom_action
+from action.common.frame_provider import get_frames
+from action.common.list_scroller import ListScroller
+from action.common.name_index import NameIndex
+from action.common.screen_change import roi_signature, signature_diff
+from action.common.wait_stable import wait_until_stable
+from action.zshg.child_model import generate_child_name
+from action.zshg.child_roster import (
+    ChildRecord,
+    ChildRoster,
+    get_child_roster,
+    hash_distance,
+    portrait_hash,
+)
+from action.zshg.role_roster import (
+    ROLE_CARD_HASH_SIZE,
+    ROLE_CARD_MAX_DISTANCE,
+    ROLE_LIST_MAX_SWIPES,
+    ROLE_LIST_ROI,
+    RoleCard,
+    RoleRosterIndex,
+    get_role_roster,
+    parse_role_card,
+    read_card_texts,
+    scan_role_list,
+    visible_cards,
+)
+
+# 批量改名进度，中断后再次执行时跳过已改名的子孙，全部完成后删除
+RENAME_CHECKPOINT_FILE = "assets/child_rename_checkpoint.json"
+
+
+@dataclass
+class RenamePlan:
+    """
+    一张卡片的改名计划
+    """
+
+    fingerprint: str  # 卡片指纹
+    card: RoleCard
+    record: ChildRecord  # 花名册中的子孙记录
+    new_name: str
+
+
+class RenameCheckpoint:
+    """
+    批量改名进度，记录已改名子孙在花名册中的 id（改名后卡片指纹会变，id 不变）
+    """
+
+    def __init__(self, path: str = RENAME_CHECKPOINT_FILE):
+        self.path = path
+        self.done: Set[int] = set()
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    # 旧版进度记录的是头像哈希，不再适用
+                    self.done = {
+                        child_id
+                        for child_id in json.load(f).get("done", [])
+                        if isinstance(child_id, int)
+                    }
+        except Exception:
+            logger.exception(f"读取改名进度失败: {path}")
+
+    def mark(self, child_id: int):
+        self.done.add(child_id)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"done": sorted(self.done), "updated_at": time.time()},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            os.replace(tmp_path, self.path)
+        except Exception:
+            logger.exception(f"保存改名进度失败: {self.path}")
+
+    def clear(self):
+        self.done.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ChildMatcher:
+    """
+    把角色列表中的卡片关联到子孙花名册中的记录
+
+    名字不唯一，可能被 OCR 识别错，也可能被手动改过，因此优先按卡片头像哈希查找已关联的子孙；
+    没有关联时才按名字（容忍 OCR 错字）匹配，并要求该名字在列表中只出现一次、
+    在花名册中只对应一名未关联的子孙。一次改名中每条记录最多对应一张卡片。
+    """
+
+    def __init__(self, roster: ChildRoster, cards: List[RoleCard]):
+        self.roster = roster
+        self.names = NameIndex(roster.names())
+        self.name_counts = Counter(card.name for card in cards if card.name)
+        self.claimed: Set[int] = set()
+
+    def match(self, card: RoleCard) -> Tuple[Optional[ChildRecord], bool]:
+        """
+        Returns:
+            (子孙记录, 是否是按名字新匹配、需要记录头像关联的)；
+            找不到或无法唯一确定时记录为 None
+        """
+        name = None
+        if card.name:
+            name = card.name if card.name in self.names else self.names.match(card.name)
+
+        if card.portrait:
+            records = self.roster.find_by_card(card.portrait)
+            if len(records) > 1 and name:
+                # 头像相同的子孙再按名字区分
+                records = [record for record in records if record.name == name]
+            if len(records) == 1:
+                return self._claim(records[0]), False
+            if records:
+                logger.warning(f"{card.name} 的头像对应多名子孙，跳过")
+                return None, False
+
+        if not name or self.name_counts[card.name] > 1:
+            return None, False
+        records = [
+            record
+            for record in self.roster.find_by_name(name)
+            if not self.roster.is_linked(record.id)
+        ]
+        if len(records) > 1:
+            logger.warning(f"花名册中有 {len(records)} 名子孙叫 {name}，跳过")
+        if len(records) != 1:
+            return None, False
+        return self._claim(records[0]), True
+
+    def _claim(self, record: ChildRecord) -> Optional[ChildRecord]:
+        if record.id in self.claimed:
+            logger.warning(f"{record.name}（#{record.id}）已对应其他卡片，跳过")
+            return None
+        self.claimed.add(record.id)
+        return record
+
+
+def plan_rename(
+    done: Set[int], fingerprint: str, card: RoleCard, record: ChildRecord
+) -> Optional[RenamePlan]:
+    """
+    为一张已关联子孙的卡片生成改名计划
+
+    详情（潜力、血脉、特性、父母最高爵位）取自子孙花名册，不需要打开详情页识别；
+    已改过名或名称已符合命名规则的卡片返回 None。
+    """
+    if record.id in done:
+        return None
+    new_name = generate_child_name(
+        record.potential, record.bloodline, record.features, record.highest_title
+    )
+    # OCR 可能混淆字母大小写
+    if new_name.lower() == card.name.lower():
+        return None
+    return RenamePlan(fingerprint, card, record, new_name)
+
+
+def _scroll_to_top(context: Context):
+    """上滑角色列表直到画面不再移动"""
+    frames = get_frames(context)
+    for _ in range(ROLE_LIST_MAX_SWIPES):
+        before = frames.get()
+        frames.run_task("RoleListSwipeUp")
+        wait_until_stable(
+            context,
+            "scroll_RoleListSwipeUp",
+            timeout_ms=1000,
+            roi=ROLE_LIST_ROI,
+            min_ms=200,
+            before=before,
+        )
+        if (
+            signature_diff(
+                roi_signature(before, ROLE_LIST_ROI),
+                roi_signature(frames.get(), ROLE_LIST_ROI),
+            )
+            <= 2.0
+        ):
+            return
+
+
+def _locate_card(
+    context: Context, scroller: ListScroller, position: int
+) -> Optional[List[int]]:
+    """向下滑动直到第 position 张卡片完整显示，返回卡片区域；滑到底或无法拼接时返回 None"""
+    frames = get_frames(context)
+    while True:
+        for card_position, card_roi in visible_cards(scroller.scrolled, frames.get()):
+            if card_position == position:
+                return card_roi
+        scrolled = scroller.scrolled
+        if scroller.next_page() is None or scroller.scrolled == scrolled:
+            return None
+
+
+@custom_action("ChildBatchRename")
+class ChildBatchRename(CustomAction):
+    """
+    按命名规则批量修改角色列表中子孙的名字
+
+    卡片与子孙的关联见 ChildMatcher。参数 {"dry_run": true} 时只输出改名计划。
+    """
+
+    def run(
+        self, context: Context, argv: CustomAction.RunArg
+    ) -> CustomAction.RunResult:
+        dry_run = False
+        if argv.custom_action_param:
+            try:
+                dry_run = bool(json.loads(argv.custom_action_param).get("dry_run"))
+            except (ValueError, TypeError, AttributeError):
+                logger.warning(f"无效的改名参数：{argv.custom_action_param}")
+
+        roster = get_child_roster()
+        if roster is None:
+            logger.error("子孙花名册不可用，无法批量改名")
+            return CustomAction.RunResult(success=False)
+
+        frames = get_frames(context)
+        frames.run_task("UI_RoleListPage")
+        index = get_role_roster()
+        # 旧索引中的卡片没有头像哈希，需要重新扫描
+        if not len(index) or any(not card.portrait for _, card in index.entries):
+            scan_role_list(context, index)
+            _scroll_to_top(context)
+
+        checkpoint = RenameCheckpoint()
+        if checkpoint.done:
+            logger.info(f"从上次进度继续，已改名 {len(checkpoint.done)} 名子孙")
+
+        items = index.ordered()
+        renamed, finished = self._rename_all(
+            context, roster, index, checkpoint, items, dry_run
+        )
+        if finished and not dry_run:
+            checkpoint.clear()
+        logger.info(
+            f"批量改名{'完成' if finished else '中断'}，本次改名 {renamed} 名子孙"
+        )
+        return CustomAction.RunResult(success=finished)
+
+    def _rename_all(
+        self,
+        context: Context,
+        roster: ChildRoster,
+        index: RoleRosterIndex,
+        checkpoint: RenameCheckpoint,
+        items: List[Tuple[str, RoleCard]],
+        dry_run: bool,
+    ) -> Tuple[int, bool]:
+        """
+        Returns:
+            (改名数量, 是否处理完所有卡片)
+        """
+        if not items:
+            return 0, True
+
+        scroller = ListScroller(
+            context,
+            ROLE_LIST_ROI,
+            "RoleListSwipeDown",
+            max_swipes=ROLE_LIST_MAX_SWIPES,
+        )
+        scroller.first_page()
+        frames = get_frames(context)
+        matcher = ChildMatcher(roster, [card for _, card in items])
+        renamed = 0
+
+        for fingerprint, card in items:
+            if context.tasker.stopping:
+                logger.info("已停止批量改名")
+                return renamed, False
+
+            record, new_link = matcher.match(card)
+            if record is None:
+                continue
+            if new_link and card.portrait and not dry_run:
+                roster.link_card(record.id, card.portrait)
+            plan = plan_rename(checkpoint.done, fingerprint, card, record)
+            if plan is None:
+                continue
+
+            logger.info(f"{plan.card.name} -> {plan.new_name}")
+            if dry_run:
+                continue
+
+            card_roi = _locate_card(context, scroller, plan.card.position)
+            if card_roi is None:
+                logger.warning(f"未找到第 {plan.card.position + 1} 张卡片，停止改名")
+                return renamed, False
+            current = portrait_hash(frames.get(), card_roi, ROLE_CARD_HASH_SIZE)
+            if hash_distance(current, plan.fingerprint) > ROLE_CARD_MAX_DISTANCE:
+                logger.warning(
+                    f"第 {plan.card.position + 1} 张卡片与索引不一致，请重新扫描角色列表"
+                )
+                return renamed, False
+
+            # 打开详情、输入并确认名字，再返回列表
+            frames.click_box(card_roi)
+            detail = frames.run_task(
+                "RoleDetailSetName",
+                pipeline_override={
+                    "RoleDetailSetNameInput": {"input_text": plan.new_name}
+                },
+            )
+            frames.run_task("BackButton_500ms")
+            if not detail or not detail.status.succeeded:
+                logger.warning(f"{plan.card.name} 改名失败，停止改名")
+                return renamed, False
+            if not self._verify_name(context, scroller, plan):
+                return renamed, False
+            renamed += 1
+            self._commit(roster, index, checkpoint, plan)
+
+        return renamed, True
+
+    def _verify_name(
+        self, context: Context, scroller: ListScroller, plan: RenamePlan
+    ) -> bool:
+        """返回列表后重新识别卡片上的名字，确认改名已生效"""
+        card_roi = _locate_card(context, scroller, plan.card.position)
+        name = ""
+        if card_roi is not None:
+            name = parse_role_card(read_card_texts(context, card_roi)).name
+        # OCR 可能混淆字母大小写
+        if name.lower() != plan.new_name.lower():
+            logger.warning(
+                f"第 {plan.card.position + 1} 张卡片名字为 {name or '（未识别）'}，"
+                f"不是 {plan.new_name}，停止改名"
+            )
+            return False
+        return True
+
+    def _commit(
+        self,
+        roster: ChildRoster,
+        index: RoleRosterIndex,
+        checkpoint: RenameCheckpoint,
+        plan: RenamePlan,
+    ):
+        """记录一次改名：更新花名册中的名字、角色列表索引和改名进度"""
+        try:
+            roster.set_name(plan.record.id, plan.new_name)
+        except Exception:
+            logger.exception("更新子孙花名册失败")
+        index.replace_card(plan.card, replace(plan.card, name=plan.new_name))
+        checkpoint.mark(plan.record.id)
@@ -0,0 +1,441 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+
+from utils import logger
+from action.zshg.child_model import (
+    ATTRIBUTE_NAMES,
+    ATTRIBUTE_RANK,
+    Bloodline,
+    Feature,
+    ParentInfo,
+    Potential,
+    get_attribute_grade,
+)
+
+# 子孙花名册数据库
+CHILD_ROSTER_FILE = "assets/child_roster.db"
+# 生娃事件界面中子孙头像所在区域 [x, y, w, h]（父母信息卡之间）
+CHILD_PORTRAIT_ROI = [240, 300, 257, 200]
+# 感知哈希边长，哈希共 HASH_SIZE * HASH_SIZE 位
+HASH_SIZE = 8
+# 角色列表卡片头像哈希的汉明距离不超过该值视为同一头像
+CARD_HASH_MAX_DISTANCE = 4
+
+# 花名册结构版本，低于该版本的数据库以头像哈希为主键，升级时清空
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS children (
+    id INTEGER PRIMARY KEY,
+    phash TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    highest_title TEXT NOT NULL DEFAULT '',
+    father_name TEXT NOT NULL DEFAULT '',
+    father_title TEXT NOT NULL DEFAULT '',
+    father_group TEXT NOT NULL DEFAULT '',
+    mother_name TEXT NOT NULL DEFAULT '',
+    mother_title TEXT NOT NULL DEFAULT '',
+    mother_group TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_children_phash ON children (phash);
+CREATE INDEX IF NOT EXISTS idx_children_name ON children (name);
+CREATE TABLE IF NOT EXISTS attributes (
+    child_id INTEGER NOT NULL REFERENCES children(id) ON DELETE CASCADE,
+    attr TEXT NOT NULL,
+    value REAL NOT NULL,
+    grade TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (child_id, attr)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_attributes_rank ON attributes (rank, child_id);
+CREATE TABLE IF NOT EXISTS bloodlines (
+    child_id INTEGER NOT NULL REFERENCES children(id) ON DELETE CASCADE,
+    bloodline TEXT NOT NULL,
+    percent REAL NOT NULL,
+    PRIMARY KEY (child_id, bloodline)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_bloodlines_name ON bloodlines (bloodline, percent);
+CREATE TABLE IF NOT EXISTS features (
+    child_id INTEGER NOT NULL REFERENCES children(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (child_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_features_name ON features (name);
+CREATE TABLE IF NOT EXISTS card_links (
+    card_hash TEXT NOT NULL,
+    child_id INTEGER NOT NULL REFERENCES children(id) ON DELETE CASCADE,
+    PRIMARY KEY (card_hash, child_id)
+) WITHOUT ROWID;
+"""
+
+_TABLES = ["card_links", "features", "bloodlines", "attributes", "children"]
+
+
+def portrait_hash(
+    image: numpy.ndarray,
+    roi: List[int] = CHILD_PORTRAIT_ROI,
+    hash_size: int = HASH_SIZE,
+) -> str:
+    """
+    计算 ROI 的差值感知哈希（dHash）
+
+    缩小到 hash_size x (hash_size + 1) 的灰度块均值，比较左右相邻块的亮度得到每一位，
+    对截图缩放、压缩噪声不敏感。
+
+    Returns:
+        str: 十六进制字符串，共 hash_size * hash_size 位
+    """
+    x, y, w, h = roi
+    crop = image[max(y, 0) : y + h, max(x, 0) : x + w]
+    if crop.ndim == 3:
+        crop = crop.mean(axis=2)
+    crop = crop.astype(numpy.float64)
+
+    rows = numpy.linspace(0, crop.shape[0], hash_size + 1).astype(int)
+    cols = numpy.linspace(0, crop.shape[1], hash_size + 2).astype(int)
+    blocks = numpy.add.reduceat(crop, rows[:-1], axis=0)
+    blocks = numpy.add.reduceat(blocks, cols[:-1], axis=1)
+    blocks /= numpy.outer(numpy.diff(rows), numpy.diff(cols))
+
+    bits = (blocks[:, 1:] > blocks[:, :-1]).flatten()
+    return numpy.packbits(bits).tobytes().hex()
+
+
+def _grade_columns(value: float) -> tuple:
+    """属性值对应的 (等级, 等级优先级)"""
+    grade = get_attribute_grade(value)
+    return grade, ATTRIBUTE_RANK[grade]
+
+
+def hash_distance(a: str, b: str) -> int:
+    """两个感知哈希的汉明距离"""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+@dataclass
+class ChildRecord:
+    """
+    花名册中的一条子孙记录
+    """
+
+    phash: str  # 生娃事件中的头像哈希，共用立绘的子孙哈希相同，不能作为标识
+    name: str = ""  # 已设置的命名
+    highest_title: str = ""  # 父母最高爵位
+    potential: Potential = field(default_factory=Potential)
+    bloodline: Bloodline = field(default_factory=Bloodline)
+    features: List[Feature] = field(default_factory=list)
+    father: ParentInfo = field(default_factory=ParentInfo)
+    mother: ParentInfo = field(default_factory=ParentInfo)
+    id: Optional[int] = None  # 花名册中的唯一标识，写入后分配
+
+
+class ChildRoster:
+    """
+    子孙花名册
+
+    SQLite（WAL 模式）存储已识别子孙的潜力、血脉、特性和父母信息，每名子孙一行、以自增 id 为键。
+    婴儿头像多为共用立绘，头像哈希只作普通索引。
+    属性按等级、血脉按名称、特性按名称建有索引，可按条件筛选子孙。
+    """
+
+    def __init__(self, path: str = CHILD_ROSTER_FILE):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 自定义动作可能在不同线程中执行，连接共用并加锁
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _migrate(self):
+        """旧版花名册以头像哈希为主键，共用立绘的子孙互相覆盖，记录不可信，直接清空"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'children'"
+        ).fetchone()
+        if version >= SCHEMA_VERSION or not exists:
+            return
+        logger.warning("子孙花名册结构已更新，旧记录以头像哈希为主键，已清空")
+        with self._conn:
+            for table in _TABLES:
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM children").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, child_id: int) -> Optional[ChildRecord]:
+        """按 id 查找子孙"""
+        records = self._load([child_id])
+        return records[0] if records else None
+
+    def find_by_name(self, name: str) -> List[ChildRecord]:
+        """按已设置的命名查找子孙，名字不唯一，重名时返回全部记录"""
+        with self._lock:
+            ids = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT id FROM children WHERE name = ?", (name,)
+                )
+            ]
+        return self._load(ids)
+
+    def find_by_card(
+        self, card_hash: str, max_distance: int = CARD_HASH_MAX_DISTANCE
+    ) -> List[ChildRecord]:
+        """按角色列表卡片头像哈希查找已关联的子孙，头像相同的子孙可能不止一个"""
+        with self._lock:
+            links = self._conn.execute(
+                "SELECT card_hash, child_id FROM card_links"
+            ).fetchall()
+        ids = [
+            child_id
+            for known, child_id in links
+            if hash_distance(card_hash, known) <= max_distance
+        ]
+        return self._load(list(dict.fromkeys(ids)))
+
+    def is_linked(self, child_id: int) -> bool:
+        """子孙是否已关联角色列表卡片"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM card_links WHERE child_id = ? LIMIT 1", (child_id,)
+            ).fetchone()
+        return row is not None
+
+    def link_card(self, child_id: int, card_hash: str):
+        """记录子孙在角色列表中的卡片头像哈希，之后改名（包括手动改名）也能找到"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO card_links VALUES (?, ?)", (card_hash, child_id)
+            )
+
+    def names(self) -> List[str]:
+        """所有已设置的命名"""
+        with self._lock:
+            return [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT DISTINCT name FROM children WHERE name != ''"
+                )
+            ]
+
+    def save(self, record: ChildRecord) -> int:
+        """
+        写入一条子孙记录：record.id 为空时新增一行，否则覆盖该 id 的记录
+
+        Returns:
+            int: 记录的 id，同时写回 record.id
+        """
+        values = record.potential.values
+        row = (
+            record.phash,
+            record.name,
+            record.highest_title,
+            record.father.name,
+            record.father.title,
+            record.father.mercenary_group,
+            record.mother.name,
+            record.mother.title,
+            record.mother.mercenary_group,
+            time.time(),
+        )
+        with self._lock, self._conn:
+            if record.id is None:
+                record.id = self._conn.execute(
+                    "INSERT INTO children (phash, name, highest_title, "
+                    "father_name, father_title, father_group, "
+                    "mother_name, mother_title, mother_group, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                ).lastrowid
+            else:
+                self._conn.execute(
+                    "UPDATE children SET phash = ?, name = ?, highest_title = ?, "
+                    "father_name = ?, father_title = ?, father_group = ?, "
+                    "mother_name = ?, mother_title = ?, mother_group = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (*row, record.id),
+                )
+                for table in ("attributes", "bloodlines", "features"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE child_id = ?", (record.id,)
+                    )
+            self._conn.executemany(
+                "INSERT INTO attributes VALUES (?, ?, ?, ?, ?)",
+                [
+                    (record.id, attr, value, *_grade_columns(value))
+                    for attr, value in values.items()
+                ],
+            )
+            self._conn.executemany(
+                "INSERT INTO bloodlines VALUES (?, ?, ?)",
+                [
+                    (record.id, name, percent)
+                    for name, percent in record.bloodline.bloodlines.items()
+                ],
+            )
+            self._conn.executemany(
+                "INSERT INTO features VALUES (?, ?, ?, ?)",
+                [
+                    (record.id, i, feature.name, feature.description)
+                    for i, feature in enumerate(record.features)
+                ],
+            )
+        return record.id
+
+    def set_name(self, child_id: int, name: str):
+        """只更新子孙命名"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE children SET name = ?, updated_at = ? WHERE id = ?",
+                (name, time.time(), child_id),
+            )
+
+    def query(
+        self,
+        min_grade: str = "S",
+        min_count: int = 2,
+        bloodline: Optional[str] = None,
+        min_percent: float = 0.0,
+        feature: Optional[str] = None,
+    ) -> List[ChildRecord]:
+        """
+        按条件筛选子孙
+
+        Args:
+            min_grade: 属性等级下限，如 "S" 表示 S 及以上
+            min_count: 至少有几项属性达到 min_grade
+            bloodline: 必须含有的血脉，为空时不限
+            min_percent: 该血脉的最低浓度
+            feature: 必须含有的特性，为空时不限
+
+        Returns:
+            List[ChildRecord]: 符合条件的子孙，按最近更新排序
+        """
+        # 有血脉、特性条件时先走对应索引缩小范围，再按主键取属性
+        joins, where, params = [], [], []
+        if bloodline:
+            joins.append("JOIN bloodlines AS b ON b.child_id = a.child_id")
+            where.append("b.bloodline = ? AND b.percent >= ?")
+            params += [bloodline, min_percent]
+        if feature:
+            joins.append("JOIN features AS f ON f.child_id = a.child_id")
+            where.append("f.name = ?")
+            params.append(feature)
+        where.append("a.rank >= ?")
+        params += [ATTRIBUTE_RANK[min_grade], min_count]
+        sql = (
+            f"SELECT a.child_id FROM attributes AS a {' '.join(joins)} "
+            f"WHERE {' AND '.join(where)} "
+            "GROUP BY a.child_id HAVING COUNT(DISTINCT a.attr) >= ?"
+        )
+
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(sql, params)]
+        return self._load(ids)
+
+    def attribute_matrix(self) -> Tuple[List[int], numpy.ndarray]:
+        """
+        所有子孙的属性矩阵，供 grade_matrix、generate_child_names 等批量接口离线分析
+
+        Returns:
+            (子孙 id 列表，(子孙数，属性数) 矩阵)，列顺序为 ATTRIBUTE_NAMES，缺失的属性为 0
+        """
+        columns = {name: i for i, name in enumerate(ATTRIBUTE_NAMES)}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT child_id, attr, value FROM attributes ORDER BY child_id"
+            ).fetchall()
+
+        ids: List[int] = []
+        for child_id, _, _ in rows:
+            if not ids or ids[-1] != child_id:
+                ids.append(child_id)
+        index = {child_id: i for i, child_id in enumerate(ids)}
+        matrix = numpy.zeros((len(ids), len(ATTRIBUTE_NAMES)))
+        for child_id, attr, value in rows:
+            if attr in columns:
+                matrix[index[child_id], columns[attr]] = value
+        return ids, matrix
+
+    def _load(self, ids: List[int]) -> List[ChildRecord]:
+        """批量读取子孙记录，按最近更新排序"""
+        if not ids:
+            return []
+        marks = ", ".join("?" * len(ids))
+        records: Dict[int, ChildRecord] = {}
+        with self._lock:
+            for row in self._conn.execute(
+                f"SELECT id, phash, name, highest_title, "
+                f"father_name, father_title, father_group, "
+                f"mother_name, mother_title, mother_group "
+                f"FROM children WHERE id IN ({marks}) ORDER BY updated_at DESC",
+                ids,
+            ):
+                records[row[0]] = ChildRecord(
+                    id=row[0],
+                    phash=row[1],
+                    name=row[2],
+                    highest_title=row[3],
+                    father=ParentInfo(
+                        name=row[4], title=row[5], mercenary_group=row[6]
+                    ),
+                    mother=ParentInfo(
+                        name=row[7], title=row[8], mercenary_group=row[9]
+                    ),
+                )
+            for child_id, attr, value in self._conn.execute(
+                f"SELECT child_id, attr, value FROM attributes "
+                f"WHERE child_id IN ({marks})",
+                ids,
+            ):
+                records[child_id].potential.values[attr] = value
+            for child_id, name, percent in self._conn.execute(
+                f"SELECT child_id, bloodline, percent FROM bloodlines "
+                f"WHERE child_id IN ({marks})",
+                ids,
+            ):
+                records[child_id].bloodline.bloodlines[name] = percent
+            for child_id, name, description in self._conn.execute(
+                f"SELECT child_id, name, description FROM features "
+                f"WHERE child_id IN ({marks}) ORDER BY child_id, position",
+                ids,
+            ):
+                records[child_id].features.append(
+                    Feature(name=name, description=description)
+                )
+        return list(records.values())
+
+
+_roster: Optional[ChildRoster] = None
+
+
+def get_child_roster() -> Optional[ChildRoster]:
+    """共享的子孙花名册，打开失败时返回 None（不使用缓存）"""
+    global _roster
+    if _roster is None:
+        try:
+            _roster = ChildRoster()
+        except sqlite3.Error:
+            logger.exception(f"打开子孙花名册失败: {CHILD_ROSTER_FILE}")
+            return None
+    return _roster
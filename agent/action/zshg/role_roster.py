@@ -0,0 +1,399 @@
+import json
+import math
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field, replace
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy
+from maa.context import Context
+from maa.custom_action import CustomAction
+
+from utils import logger
+from action.common.action_registry import custom_action
+from action.common.frame_provider import get_frames
+from action.common.list_scroller import ListScroller
+from action.zshg.child_roster import hash_distance, portrait_hash
+
+# 角色列表索引：卡片指纹及卡片信息
+ROLE_ROSTER_FILE = "assets/role_roster.json"
+# 以下列表区域、卡片布局、头像区域和 RoleListSwipeDown/Up 的滑动坐标是按 720x1280 估算的，
+# 尚未对照真实角色列表截图校准，校准前角色列表扫描和子孙批量改名不在 interface.json 中提供
+# 角色列表区域 [x, y, w, h]
+ROLE_LIST_ROI = [15, 160, 690, 990]
+# 角色卡片布局（像素）：首张卡片相对列表区域顶部的偏移、卡片间距、卡片高度
+ROLE_CARD_LAYOUT = {"top": 0, "pitch": 165, "height": 150}
+# 卡片间隔行的平均逐行灰度标准差低于卡片行的该比例时，才认为从画面定位到了卡片
+ROLE_CARD_GAP_RATIO = 0.5
+# 卡片指纹边长，需区分姓名文字
+ROLE_CARD_HASH_SIZE = 16
+# 卡片上头像所在区域，相对卡片左上角 [x, y, w, h]；头像哈希不含姓名，改名后不变
+ROLE_CARD_PORTRAIT_ROI = [10, 10, 130, 130]
+# 汉明距离不超过该值视为同一张卡片（指纹共 256 位）。误判为同一张卡片会沿用旧的姓名，
+# 漏判只多一次 OCR，因此只容忍截图缩放、压缩带来的零星翻转（约 1%）；
+# 校准时应取同一卡片多次截图的最大距离与不同卡片最小距离之间的值
+ROLE_CARD_MAX_DISTANCE = 3
+# 最多滑动次数，足够翻完 100+ 名成员
+ROLE_LIST_MAX_SWIPES = 40
+
+ROLE_TITLES = ["公爵", "伯爵", "男爵", "骑士"]
+
+# 角色姓名：含汉字，可夹带字母数字（如按命名规则生成的 "力ss技s勇公"）
+ROLE_NAME_PATTERN = re.compile(
+    r"^(?=.*[\u4e00-\u9fff])[\u4e00-\u9fffA-Za-z0-9.]{2,12}$"
+)
+
+
+@dataclass
+class RoleCard:
+    """
+    角色列表中的一张卡片
+    """
+
+    name: str = ""  # 姓名
+    title: str = ""  # 爵位，没有时为空
+    texts: List[str] = field(default_factory=list)  # 卡片上识别到的全部文本
+    position: int = 0  # 上次扫描时在列表中的序号（从 0 开始）
+    updated_at: float = 0.0  # 最近一次 OCR 的时间
+    portrait: str = ""  # 卡片头像哈希，用于关联子孙花名册
+
+
+def parse_role_card(texts: List[str]) -> RoleCard:
+    """从卡片文本中取姓名和爵位：爵位取第一个含爵位的文本，姓名取第一个符合姓名格式的文本"""
+    card = RoleCard(texts=texts, updated_at=time.time())
+    for text in texts:
+        title = next((title for title in ROLE_TITLES if title in text), "")
+        if title and not card.title:
+            card.title = title
+            text = text.replace(title, "")
+        if not card.name and ROLE_NAME_PATTERN.match(text):
+            card.name = text
+    return card
+
+
+def read_card_texts(context: Context, card_roi: List[int]) -> List[str]:
+    """OCR 识别一张卡片上的文本"""
+    reco = get_frames(context).run_recognition(
+        "RoleCardCheck", pipeline_override={"RoleCardCheck": {"roi": card_roi}}
+    )
+    if not reco or not reco.hit:
+        return []
+    return [
+        item.text.strip()
+        for item in reco.all_results
+        if item.score > 0.5 and item.text.strip()
+    ]
+
+
+def card_portrait_hash(image: numpy.ndarray, card_roi: List[int]) -> str:
+    """卡片头像的感知哈希"""
+    x, y, w, h = ROLE_CARD_PORTRAIT_ROI
+    return portrait_hash(image, [card_roi[0] + x, card_roi[1] + y, w, h])
+
+
+def locate_cards(image: numpy.ndarray) -> Optional[List[int]]:
+    """
+    从画面定位列表区域内完整显示的卡片
+
+    卡片之间的间隔行颜色均匀，逐行灰度标准差最低。按卡片间距找出间隔所在的相位，
+    即得到各卡片的位置；间隔不明显（如列表为空、画面在过渡中）时返回 None。
+
+    Returns:
+        Optional[List[int]]: 各卡片顶部的 y 坐标，从上到下
+    """
+    x, y, w, h = ROLE_LIST_ROI
+    pitch, height = ROLE_CARD_LAYOUT["pitch"], ROLE_CARD_LAYOUT["height"]
+    crop = image[y : y + h, x : x + w]
+    if crop.ndim == 3:
+        crop = crop.mean(axis=2)
+    if crop.shape[0] < pitch:
+        return None
+    row_std = crop.astype(numpy.float32).std(axis=1)
+
+    rows = numpy.arange(len(row_std))
+    best_phase, best_ratio = None, ROLE_CARD_GAP_RATIO
+    for phase in range(pitch):
+        gap = (rows - phase) % pitch >= height
+        card_std = row_std[~gap].mean()
+        if card_std <= 0:
+            continue
+        ratio = row_std[gap].mean() / card_std
+        if ratio < best_ratio:
+            best_phase, best_ratio = phase, ratio
+    if best_phase is None:
+        return None
+    return [y + card_top for card_top in range(best_phase, h - height + 1, pitch)]
+
+
+def visible_cards(
+    scrolled: int, image: Optional[numpy.ndarray] = None
+) -> List[Tuple[int, List[int]]]:
+    """
+    列表滚动 scrolled 像素后完整显示在列表区域内的卡片
+
+    传入截图时卡片区域从画面定位，滚动距离只用来推算序号（四舍五入到最近的卡片，
+    累计误差不超过半张卡片都不影响）；无法从画面定位时按布局推算。
+
+    Returns:
+        List[Tuple[int, List[int]]]: (卡片序号, 卡片区域 [x, y, w, h])
+    """
+    x, y, w, h = ROLE_LIST_ROI
+    top, pitch, height = (
+        ROLE_CARD_LAYOUT["top"],
+        ROLE_CARD_LAYOUT["pitch"],
+        ROLE_CARD_LAYOUT["height"],
+    )
+    card_ys = locate_cards(image) if image is not None else None
+    if card_ys is not None:
+        return [
+            (round((card_y - y - top + scrolled) / pitch), [x, card_y, w, height])
+            for card_y in card_ys
+        ]
+
+    position = max(0, math.ceil((scrolled - top) / pitch))
+    cards = []
+    while True:
+        card_y = y + top + position * pitch - scrolled
+        if card_y + height > y + h:
+            return cards
+        cards.append((position, [x, card_y, w, height]))
+        position += 1
+
+
+class RoleRosterIndex:
+    """
+    角色列表索引
+
+    按卡片画面指纹记录已识别的卡片，再次扫描时指纹相同（或足够接近）的卡片直接复用，
+    只对新成员和外观变化（改名、晋升等）的卡片做 OCR。
+    外观完全相同的卡片各占一个条目，因此按条目序号而不是指纹区分卡片。
+    """
+
+    def __init__(self, path: str = ROLE_ROSTER_FILE):
+        self.path = path
+        self.entries: List[Tuple[str, RoleCard]] = []  # (卡片指纹, 卡片)
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    for item in json.load(f):
+                        fingerprint = item.pop("fingerprint")
+                        self.entries.append((fingerprint, RoleCard(**item)))
+        except Exception:
+            logger.exception(f"读取角色列表索引失败: {path}")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find(
+        self,
+        fingerprint: str,
+        max_distance: int = ROLE_CARD_MAX_DISTANCE,
+        exclude: Optional[Set[int]] = None,
+    ) -> Optional[int]:
+        """
+        按指纹查找卡片，优先完全相同的指纹，否则取汉明距离最近且不超过 max_distance 的条目
+
+        Args:
+            fingerprint: 卡片指纹
+            max_distance: 最大汉明距离
+            exclude: 不参与匹配的条目序号（本次扫描已匹配过的条目）
+
+        Returns:
+            Optional[int]: 条目序号，没有匹配时返回 None
+        """
+        best, best_distance = None, max_distance + 1
+        for i, (known, _) in enumerate(self.entries):
+            if exclude and i in exclude:
+                continue
+            distance = 0 if known == fingerprint else hash_distance(fingerprint, known)
+            if distance < best_distance:
+                best, best_distance = i, distance
+                if distance == 0:
+                    break
+        return best
+
+    def ordered(self) -> List[Tuple[str, RoleCard]]:
+        """按列表顺序排列的 (指纹, 卡片)"""
+        return sorted(self.entries, key=lambda entry: entry[1].position)
+
+    def update(
+        self, seen: List[Tuple[str, RoleCard]], matched: Set[int], complete: bool
+    ) -> int:
+        """
+        用本次扫描结果更新索引
+
+        Args:
+            seen: 本次扫描到的 (指纹, 卡片)
+            matched: 本次扫描中匹配到的已有条目序号，这些条目由 seen 中的新卡片取代
+            complete: 是否扫描到列表底部；只有完整扫描时才移除未出现的卡片
+
+        Returns:
+            int: 移除的卡片数
+        """
+        kept = []
+        if not complete:
+            kept = [entry for i, entry in enumerate(self.entries) if i not in matched]
+        removed = len(self.entries) - len(matched) - len(kept)
+        self.entries = kept + list(seen)
+        self.save()
+        return removed
+
+    def replace_card(self, card: RoleCard, new_card: RoleCard):
+        """用 new_card 替换索引中的 card（按对象比较，不修改原卡片）并保存"""
+        for i, (fingerprint, known_card) in enumerate(self.entries):
+            if known_card is card:
+                self.entries[i] = (fingerprint, new_card)
+                self.save()
+                return
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            data = [
+                {"fingerprint": fingerprint, **asdict(card)}
+                for fingerprint, card in self.ordered()
+            ]
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            logger.exception(f"保存角色列表索引失败: {self.path}")
+
+
+_role_roster: Optional[RoleRosterIndex] = None
+
+
+def get_role_roster() -> RoleRosterIndex:
+    global _role_roster
+    if _role_roster is None:
+        _role_roster = RoleRosterIndex()
+    return _role_roster
+
+
+def _overlap_shift(
+    prev_page: List[Tuple[int, str]], page: List[Tuple[int, str]]
+) -> int:
+    """
+    用与上一页重叠的卡片校正本页序号
+
+    本页某张卡片的指纹只与上一页的一张卡片接近时，两者是同一张卡片，
+    按其在上一页的序号校正本页所有卡片的序号；找不到唯一对应时不校正。
+
+    Args:
+        prev_page: 上一页的 (序号, 指纹)
+        page: 本页按滚动距离推算的 (序号, 指纹)
+
+    Returns:
+        int: 本页序号需要加上的偏移
+    """
+    for position, fingerprint in page:
+        matches = [
+            prev_position
+            for prev_position, prev_fingerprint in prev_page
+            if hash_distance(fingerprint, prev_fingerprint) <= ROLE_CARD_MAX_DISTANCE
+        ]
+        if len(matches) == 1:
+            return matches[0] - position
+    return 0
+
+
+def scan_role_list(context: Context, index: RoleRosterIndex) -> List[RoleCard]:
+    """
+    从当前位置向下翻完角色列表，更新索引
+
+    每页从画面定位完整显示的卡片并计算指纹，卡片序号按滚动距离推算，
+    再用与上一页重叠的卡片校正；索引中已有的卡片不再 OCR。
+    每个索引条目在一次扫描中最多对应一个序号，外观相同的卡片分别记录。
+
+    Returns:
+        List[RoleCard]: 本次扫描到的卡片，按列表顺序
+    """
+    frames = get_frames(context)
+    start = time.perf_counter()
+    scroller = ListScroller(
+        context, ROLE_LIST_ROI, "RoleListSwipeDown", max_swipes=ROLE_LIST_MAX_SWIPES
+    )
+    scroller.first_page()
+
+    # 卡片序号 -> (指纹, 卡片)
+    seen: Dict[int, Tuple[str, RoleCard]] = {}
+    matched: Set[int] = set()  # 本次扫描已匹配的索引条目
+    prev_page: List[Tuple[int, str]] = []
+    ocr_count = 0
+    reused = 0
+    complete = False
+    while True:
+        image = frames.get()
+        cards = visible_cards(scroller.scrolled, image)
+        page = [
+            (position, portrait_hash(image, card_roi, ROLE_CARD_HASH_SIZE))
+            for position, card_roi in cards
+        ]
+        shift = _overlap_shift(prev_page, page)
+        page = [(position + shift, fingerprint) for position, fingerprint in page]
+        prev_page = page
+
+        for (position, fingerprint), (_, card_roi) in zip(page, cards):
+            if position < 0 or position in seen:
+                continue
+
+            entry = index.find(fingerprint, exclude=matched)
+            if entry is not None:
+                matched.add(entry)
+                fingerprint, known_card = index.entries[entry]
+                card = replace(
+                    known_card,
+                    position=position,
+                    portrait=card_portrait_hash(image, card_roi),
+                )
+                reused += 1
+            else:
+                texts = read_card_texts(context, card_roi)
+                ocr_count += 1
+                if not texts:
+                    # 列表末尾的空位
+                    continue
+                card = parse_role_card(texts)
+                card.position = position
+                card.portrait = card_portrait_hash(image, card_roi)
+            seen[position] = (fingerprint, card)
+
+        scrolled = scroller.scrolled
+        if scroller.next_page() is None:
+            complete = scroller.swipes < scroller.max_swipes
+            break
+        if scroller.scrolled == scrolled:
+            # 无法拼接时推算不出卡片位置，保留已扫描的部分
+            logger.warning("角色列表无法拼接，停止扫描")
+            break
+
+    removed = index.update(
+        [seen[position] for position in sorted(seen)], matched, complete
+    )
+    logger.info(
+        f"角色列表扫描完成，共 {len(seen)} 名成员：OCR {ocr_count} 张卡片，"
+        f"复用 {reused} 张，移除 {removed} 张，"
+        f"滑动 {scroller.swipes} 次，耗时 {time.perf_counter() - start:.1f}s"
+    )
+    return [seen[position][1] for position in sorted(seen)]
+
+
+@custom_action("RoleListScan")
+class RoleListScan(CustomAction):
+    """
+    扫描角色列表，更新角色列表索引
+    """
+
+    def run(
+        self, context: Context, argv: CustomAction.RunArg
+    ) -> CustomAction.RunResult:
+        frames = get_frames(context)
+        # 进入角色列表页
+        frames.run_task("UI_RoleListPage")
+
+        cards = scan_role_list(context, get_role_roster())
+        for card in cards:
+            logger.debug(f"{card.position + 1}. {card.name} {card.title}")
+        return CustomAction.RunResult(success=bool(cards))
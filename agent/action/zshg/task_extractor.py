@@ -1,8 +1,15 @@
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Union
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Set, Union
 from maa.define import OCRResult, Rect
+import atexit
+import json
+import os
+import re
 
 from utils import logger
+from action.common.box_column import BoxColumn
+from action.common.name_index import NameIndex
 
 
 @dataclass
@@ -16,55 +23,330 @@ class TaskInfo:
     abandon_button_box: Optional[Rect] = None
 
 
+@dataclass
+class TaskTable:
+    """
+    一页任务的解析结果（结构数组），第 i 个任务的各字段位于各列表的第 i 项
+
+    top_ys / bottom_ys 为任务文本块的纵向范围，可供其它面板解析复用按钮等归属判断。
+    """
+
+    names: List[str] = field(default_factory=list)
+    descriptions: List[str] = field(default_factory=list)
+    rewards: List[Optional[str]] = field(default_factory=list)
+    time_limits: List[Optional[str]] = field(default_factory=list)
+    enemy_levels: List[Optional[str]] = field(default_factory=list)
+    top_ys: List[int] = field(default_factory=list)
+    bottom_ys: List[int] = field(default_factory=list)
+    accept_boxes: List[Optional[Rect]] = field(default_factory=list)
+    abandon_boxes: List[Optional[Rect]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def row(self, i: int) -> TaskInfo:
+        return TaskInfo(
+            task_name=self.names[i],
+            task_description=self.descriptions[i],
+            reward=self.rewards[i],
+            time_limit=self.time_limits[i],
+            enemy_level=self.enemy_levels[i],
+            accept_button_box=self.accept_boxes[i],
+            abandon_button_box=self.abandon_boxes[i],
+        )
+
+    def to_tasks(self) -> List[TaskInfo]:
+        return [self.row(i) for i in range(len(self))]
+
+
+# 包含任一片段即不是任务名称
+NAME_EXCLUDE_PATTERNS = [
+    "奖励",
+    "任务时限",
+    "敌人等级",
+    "接受",
+    "放弃",
+    "当前任务",
+    "失败：",
+    "有一",
+    "一名",
+    "一支",
+    "一位",
+    "这个",
+    "委托",
+    "有-",
+    "-300",
+    "x",
+    "X",
+    "×",
+]
+# 任务描述的常见开头
+DESCRIPTION_STARTS = [
+    "有一名",
+    "有一",
+    "一名",
+    "一支",
+    "必须",
+    "委托",
+    "尽快",
+    "一位",
+    "这个",
+]
+REWARD_LABEL = "奖励："
+# 奖励数值前后查找奖励标签的行数
+REWARD_LABEL_WINDOW = 5
+
+# 多个片段合并为一个正则，每行只扫描一次
+_NAME_EXCLUDE_RE = re.compile("|".join(map(re.escape, NAME_EXCLUDE_PATTERNS)))
+_DESCRIPTION_START_RE = re.compile("|".join(map(re.escape, DESCRIPTION_STARTS)))
+
+# 设置该环境变量为 1 时，将每页任务 OCR 结果追加到 TASK_PAGES_FILE，用于基准测试
+RECORD_TASK_PAGES_ENV = "MAAGC_RECORD_TASK_PAGES"
+TASK_PAGES_FILE = "debug/task_pages.jsonl"
+
+
+def _is_reward_value(text: str) -> bool:
+    """奖励数值：纯数字或 x/X/× 开头的数字（如"x328"、"400"）"""
+    if text.isdigit():
+        return True
+    return text.startswith(("x", "X", "×")) and len(text) > 1 and text[1:].isdigit()
+
+
+def _has_name_shape(text: str) -> bool:
+    """长度和字符满足任务名称要求（不含位置和已知名称判断）"""
+    # 文本长度判断：任务名称通常较短
+    if len(text) < 2 or len(text) > 10:
+        return False
+    # 排除明显不是任务名称的文本
+    if _NAME_EXCLUDE_RE.search(text):
+        return False
+    # 排除纯数字和带有数字前缀的文本
+    return not _is_reward_value(text)
+
+
+def _is_description(text: str) -> bool:
+    """判断是否为任务描述"""
+    return _DESCRIPTION_START_RE.match(text) is not None or len(text) >= 15
+
+
+@dataclass
+class _Line:
+    """
+    单行 OCR 文本及其分类结果，每页只分类一次
+    """
+
+    result: object
+    text: str
+    y: int
+    box: object
+    name_shape: bool  # 是否为任务名称候选还取决于位置和已知名称
+    description: bool
+    reward_value: bool
+    reward_label: bool
+    name: Optional[str] = None  # 候选行对应的规范任务名称，分组时填入
+
+
+def _file_mtime(path: str) -> Optional[int]:
+    """文件修改时间（纳秒），文件不存在时返回 None"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class TaskNameStore:
+    """
+    已识别任务名称的内存存储
+
+    新名称只加入内存并标记为脏，由调用方在页面/动作边界调用 flush 批量写回；
+    写回时按名称排序，先写临时文件再原子替换，避免文件写到一半或顺序不稳定。
+    文件被外部修改（修改时间变化）时才重新读取，进程退出时兜底写回一次。
+    名称同时维护在模糊索引中，OCR 错字的文本会映射到已知名称。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.names = set()
+        self.index = NameIndex()
+        self.dirty = False
+        self.mtime = None
+        self.reload_if_changed()
+        atexit.register(self.flush)
+
+    def reload_if_changed(self) -> bool:
+        """
+        文件修改时间变化时重新读取，尚未写回的新名称会合并保留
+
+        Returns:
+            bool: 是否重新读取了文件
+        """
+        mtime = _file_mtime(self.path)
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        names = self._load() if mtime is not None else set()
+        if self.dirty:
+            names |= self.names
+        self.names = names
+        self.index = NameIndex(sorted(names))
+        return True
+
+    def _load(self) -> set:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return set(json.load(f))
+        except Exception:
+            logger.exception(f"读取任务名称文件失败: {self.path}")
+        return set()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str):
+        if name not in self.names:
+            self.names.add(name)
+            self.index.add(name)
+            self.dirty = True
+
+    def canonical(self, text: str) -> Optional[str]:
+        """text 对应的已知任务名称（允许少量 OCR 错字），未知时返回 None"""
+        return self.index.match(text)
+
+    def flush(self):
+        """有新名称时写回文件"""
+        if not self.dirty:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(sorted(self.names), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+            # 自己写回的文件不需要重新读取
+            self.mtime = _file_mtime(self.path)
+        except Exception:
+            logger.exception(f"保存任务名称文件失败: {self.path}")
+
+
+# 进程内共享的任务名称存储和提取器
+_task_name_stores: Dict[str, TaskNameStore] = {}
+_extractors: Dict[tuple, "TaskExtractor"] = {}
+
+
+def get_task_name_store(path: str) -> TaskNameStore:
+    """同一文件只使用一个存储，避免多个实例互相覆盖"""
+    store = _task_name_stores.get(path)
+    if store is None:
+        store = _task_name_stores[path] = TaskNameStore(path)
+    return store
+
+
+def get_task_extractor(roi: List[int] = None) -> "TaskExtractor":
+    """
+    获取进程内共享的任务提取器
+
+    同一 ROI 复用同一个实例，词表只在文件修改后才重新读取，
+    重复扫描任务面板时不再读取文件。
+    """
+    key = tuple(roi or [])
+    extractor = _extractors.get(key)
+    if extractor is None:
+        extractor = _extractors[key] = TaskExtractor(roi=roi)
+    return extractor
+
+
 class TaskExtractor:
     def __init__(self, roi: List[int] = None):
         self.roi = roi or [0, 0, 1920, 1080]
         self.roi_rect = Rect(*self.roi)
-        self.accept_buttons = []
+        self.accept_buttons = BoxColumn()
+        self.abandon_buttons = BoxColumn()
         self.task_names_file = "assets/task_names.json"
-        self.known_task_names = self._load_task_names()
+        self.known_task_names = get_task_name_store(self.task_names_file)
         self.task_blacklist_file = "assets/task_blacklist.txt"
-        self.task_blacklist = self._load_task_blacklist()
-
-    def _load_task_blacklist(self):
+        self.task_blacklist = frozenset()
+        self._blacklist_mtime = None
+        self.refresh_vocabulary()
+
+    def refresh_vocabulary(self) -> bool:
+        """
+        检查任务名称和黑名单文件的修改时间，有变化时重新读取
+
+        Returns:
+            bool: 词表是否发生变化
+        """
+        changed = self.known_task_names.reload_if_changed()
+
+        mtime = _file_mtime(self.task_blacklist_file)
+        if mtime != self._blacklist_mtime:
+            self._blacklist_mtime = mtime
+            self.task_blacklist = self._load_task_blacklist()
+            changed = True
+
+        if changed:
+            logger.debug(
+                f"任务词表已加载：{len(self.known_task_names)} 个任务名称，"
+                f"{len(self.task_blacklist)} 个黑名单"
+            )
+        return changed
+
+    def _load_task_blacklist(self) -> frozenset:
         try:
-            import os
-
             if os.path.exists(self.task_blacklist_file):
                 with open(self.task_blacklist_file, "r", encoding="utf-8") as f:
-                    return set(line.strip() for line in f if line.strip())
-            return set()
+                    return frozenset(line.strip() for line in f if line.strip())
         except Exception:
-            return set()
-
-    def extract_tasks(self, ocr_results: List) -> List[TaskInfo]:
+            logger.exception(f"读取任务黑名单失败: {self.task_blacklist_file}")
+        return frozenset()
+
+    def extract_tasks(
+        self, ocr_results: List, skip_names: Optional[Set[str]] = None
+    ) -> List[TaskInfo]:
+        return self.extract_table(ocr_results, skip_names).to_tasks()
+
+    def extract_table(
+        self, ocr_results: List, skip_names: Optional[Set[str]] = None
+    ) -> TaskTable:
+        """
+        解析一页任务 OCR 结果，返回结构数组形式的结果
+
+        Args:
+            ocr_results: 一页任务面板的 OCR 结果
+            skip_names: 已解析过的任务名称，名称在其中的任务组不再提取
+        """
+        table = TaskTable()
         if not ocr_results:
-            return []
+            return table
 
-        # 预处理：先缓存所有接受和放弃按钮，同时过滤无效文本
+        self.refresh_vocabulary()
+        if os.environ.get(RECORD_TASK_PAGES_ENV) == "1":
+            self._record_page(ocr_results)
+
+        # 预处理：先缓存所有接受和放弃按钮（按Y排序，供二分查找），同时过滤无效文本
         filtered_results = []
-        self.accept_buttons = []
-        self.abandon_buttons = []
+        accept_buttons = []
+        abandon_buttons = []
         for res in ocr_results:
             text = self._get_text(res).strip()
             if not text:
                 continue
             if "接受" in text:
-                self.accept_buttons.append(
-                    (
-                        self._get_box_y(self._get_box_from_result(res)),
-                        self._get_box_from_result(res),
-                    )
-                )
+                box = self._get_box_from_result(res)
+                accept_buttons.append((self._get_box_y(box), box))
             elif "放弃" in text:
-                self.abandon_buttons.append(
-                    (
-                        self._get_box_y(self._get_box_from_result(res)),
-                        self._get_box_from_result(res),
-                    )
-                )
+                box = self._get_box_from_result(res)
+                abandon_buttons.append((self._get_box_y(box), box))
             else:
                 filtered_results.append(res)
+        self.accept_buttons = BoxColumn(accept_buttons)
+        self.abandon_buttons = BoxColumn(abandon_buttons)
 
         # 按Y坐标排序（还原视觉顺序）
         sorted_results = sorted(
@@ -72,16 +354,47 @@ class TaskExtractor:
             key=lambda r: self._get_box_y(self._get_box_from_result(r)),
         )
 
+        # 一次线性扫描完成整页文本分类，后续分组和提取只读取分类结果
+        lines = [self._classify(res) for res in sorted_results]
+
         # 重新分组：以任务名称为分隔符，精准拆分任务
-        task_groups = self._group_by_task_name(sorted_results)
+        task_groups = self._group_by_task_name(lines)
 
-        tasks = []
         for group in task_groups:
-            task = self._extract_single_task(group)
-            if task and task.task_name not in self.task_blacklist:
-                tasks.append(task)
+            if skip_names and self._group_name(group) in skip_names:
+                continue
+            self._extract_single_task(group, table)
+
+        return table
+
+    def _classify(self, result) -> _Line:
+        text = self._get_text(result).strip()
+        box = self._get_box_from_result(result)
+        return _Line(
+            result=result,
+            text=text,
+            y=self._get_box_y(box),
+            box=box,
+            name_shape=_has_name_shape(text),
+            description=_is_description(text),
+            reward_value=_is_reward_value(text),
+            reward_label=REWARD_LABEL in text,
+        )
 
-        return tasks
+    def _record_page(self, ocr_results: List):
+        """追加一页 OCR 结果到 TASK_PAGES_FILE"""
+        page = []
+        for res in ocr_results:
+            box = self._get_box(self._get_box_from_result(res))
+            page.append(
+                {"text": self._get_text(res), "box": [box.x, box.y, box.w, box.h]}
+            )
+        try:
+            os.makedirs(os.path.dirname(TASK_PAGES_FILE), exist_ok=True)
+            with open(TASK_PAGES_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(page, ensure_ascii=False) + "\n")
+        except Exception:
+            logger.exception("记录任务 OCR 结果失败")
 
     def _get_box_y(self, box) -> int:
         if isinstance(box, Rect):
@@ -113,165 +426,99 @@ class TaskExtractor:
             return result.get("box", [0, 0, 0, 0])
         return [0, 0, 0, 0]
 
-    def _load_task_names(self):
-        """从文件加载已识别的任务名称"""
-        try:
-            import os
-            import json
-
-            # 检查文件是否存在
-            if os.path.exists(self.task_names_file):
-                with open(self.task_names_file, "r", encoding="utf-8") as f:
-                    task_names = json.load(f)
-                    return set(task_names)
-            else:
-                # 文件不存在，创建空文件
-                os.makedirs(os.path.dirname(self.task_names_file), exist_ok=True)
-                with open(self.task_names_file, "w", encoding="utf-8") as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
-                return set()
-        except Exception:
-            return set()
-
-    def _save_task_names(self):
-        """保存已识别的任务名称到文件"""
-        try:
-            import os
-            import json
-
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.task_names_file), exist_ok=True)
-
-            # 保存任务名称
-            task_names_list = list(self.known_task_names)
-            with open(self.task_names_file, "w", encoding="utf-8") as f:
-                json.dump(task_names_list, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
-
-    def _is_task_name_candidate(self, text: str, y_pos: int) -> bool:
-        """判断是否为任务名称候选"""
-        # 文本长度判断：任务名称通常较短
-        if len(text) < 2 or len(text) > 10:
-            return False
-
-        # 排除明显不是任务名称的文本
-        exclude_patterns = [
-            "奖励",
-            "任务时限",
-            "敌人等级",
-            "接受",
-            "放弃",
-            "当前任务",
-            "失败：",
-            "有一",
-            "一名",
-            "一支",
-            "一位",
-            "这个",
-            "委托",
-            "有-",
-            "-300",
-            "x",
-            "X",
-            "×",
-        ]
-        for pattern in exclude_patterns:
-            if pattern in text:
-                return False
-
-        # 排除纯数字和带有数字前缀的文本（如"x328"、"400"等）
-        if text.isdigit():
-            return False
-        if text.startswith(("x", "X", "×")) and len(text) > 1 and text[1:].isdigit():
-            return False
+    def flush_task_names(self):
+        """将本批新识别的任务名称写回文件，在页面/动作边界调用"""
+        self.known_task_names.flush()
 
-        # 检查是否为已知任务名称
-        if text in self.known_task_names:
+    def _is_name_position(self, text: str, y_pos: int) -> bool:
+        # 检查是否为已知任务名称（允许少量 OCR 错字）
+        if self.known_task_names.canonical(text) is not None:
             return True
-
         # 基于位置和上下文的启发式判断
         # 这里可以根据实际情况调整位置阈值
-        if y_pos < 300 or y_pos > 1200:
-            return False
+        return 300 <= y_pos <= 1200
 
-        return True
+    def _is_candidate_line(self, line: _Line) -> bool:
+        return line.name_shape and self._is_name_position(line.text, line.y)
 
-    def _group_by_task_name(self, sorted_results: List) -> List[List]:
+    def _canonical_name(self, text: str) -> str:
+        """OCR 错字的已知任务名称归并为规范名称，避免词表无限增长"""
+        name = self.known_task_names.canonical(text)
+        if name is None:
+            return text
+        if name != text:
+            logger.debug(f"任务名称 {text} 归并为 {name}")
+        return name
+
+    def _group_by_task_name(self, lines: List[_Line]) -> List[List[_Line]]:
         """以任务名称为分隔符，精准拆分任务"""
         groups = []
         current_group = []
 
-        for i, res in enumerate(sorted_results):
-            text = self._get_text(res).strip()
-            box = self._get_box_from_result(res)
-            box_y = self._get_box_y(box)
-
+        for i, line in enumerate(lines):
             # 检查是否为有效的任务名称候选
-            if self._is_task_name_candidate(text, box_y):
+            if self._is_candidate_line(line):
+                line.name = self._canonical_name(line.text)
                 # 检查是否与前一个元素有较大的垂直间距（任务分隔）
                 if current_group:
-                    prev_res = sorted_results[i - 1]
-                    prev_box = self._get_box_from_result(prev_res)
-                    prev_box_y = self._get_box_y(prev_box)
-
                     # 如果垂直间距大于阈值，认为是新任务
-                    if box_y - prev_box_y > 50:
-                        # 将新识别的任务名称添加到已知列表
-                        self.known_task_names.add(text)
-                        # 保存到文件
-                        self._save_task_names()
+                    if line.y - lines[i - 1].y > 50:
+                        # 将新识别的任务名称添加到已知列表，稍后批量写回
+                        self.known_task_names.add(line.name)
 
                         groups.append(current_group)
-                        current_group = [res]
+                        current_group = [line]
                     else:
                         # 否则认为是当前任务的一部分
-                        current_group.append(res)
+                        current_group.append(line)
                 else:
                     # 第一个元素，直接作为新任务的开始
-                    self.known_task_names.add(text)
-                    self._save_task_names()
-                    current_group = [res]
+                    self.known_task_names.add(line.name)
+                    current_group = [line]
             else:
                 # 非任务名称，添加到当前组
-                current_group.append(res)
+                current_group.append(line)
 
         if current_group:
             groups.append(current_group)
 
         return groups
 
-    def _extract_single_task(self, ocr_results: List) -> Optional[TaskInfo]:
+    def _group_name(self, lines: List[_Line]) -> Optional[str]:
+        """任务组的任务名称，取法与 _extract_single_task 一致"""
+        for line in lines:
+            if self._is_candidate_line(line):
+                return line.name or line.text
+        return None
+
+    def _extract_single_task(self, lines: List[_Line], table: TaskTable) -> bool:
+        """
+        提取一组文本对应的任务并追加到 table
+
+        Returns:
+            bool: 是否追加了任务（无任务名称或在黑名单中时不追加）
+        """
         task_name = None
         task_description = ""
         reward = []
         time_limit = None
         enemy_level = None
-        accept_button_box = None
-        abandon_button_box = None
-
-        # 提取当前任务的Y范围（用于匹配对应接受按钮）
-        group_min_y = self._get_box_y(self._get_box_from_result(ocr_results[0]))
-        group_max_y = self._get_box_y(self._get_box_from_result(ocr_results[-1]))
 
-        # 存储每个元素的位置信息，用于更好地判断上下文
-        elements = []
-        for result in ocr_results:
-            text = self._get_text(result).strip()
-            box = self._get_box_from_result(result)
-            box_y = self._get_box_y(box)
-            elements.append((text, box_y, box))
+        # 提取当前任务的Y范围（用于匹配对应接受按钮），行已按Y坐标排序
+        group_min_y = lines[0].y
+        group_max_y = lines[-1].y
 
-        # 按Y坐标排序元素
-        elements.sort(key=lambda x: x[1])
+        # 预先记录奖励标签所在行，奖励数值只需二分查找附近是否有标签
+        label_rows = [i for i, line in enumerate(lines) if line.reward_label]
 
         # 提取任务信息
-        for i, (text, box_y, box) in enumerate(elements):
+        for i, line in enumerate(lines):
+            text = line.text
             # 提取任务名称（通常是第一个有效的候选）
-            if not task_name and self._is_task_name_candidate(text, box_y):
-                task_name = text
+            if not task_name and self._is_candidate_line(line):
+                task_name = line.name or text
             # 提取任务描述
-            elif self._is_description(text):
+            elif line.description:
                 task_description += text
             # 提取任务时限
             elif text.startswith("任务时限："):
@@ -279,66 +526,39 @@ class TaskExtractor:
             # 提取敌人等级
             elif text.startswith("敌人等级："):
                 enemy_level = text.replace("敌人等级：", "").strip()
-            # 提取奖励（匹配x开头的数值或纯数字，通常在"奖励："附近）
-            elif (
-                text.startswith(("x", "X", "×"))
-                and len(text) > 1
-                and text[1:].isdigit()
-            ) or text.isdigit():
-                # 检查是否在"奖励："附近
-                has_reward_label = False
-                for j in range(max(0, i - 5), min(len(elements), i + 5)):
-                    if "奖励：" in elements[j][0]:
-                        has_reward_label = True
-                        break
-                if has_reward_label:
+            # 提取奖励（匹配x开头的数值或纯数字，要求在"奖励："附近）
+            elif line.reward_value:
+                k = bisect_left(label_rows, i - REWARD_LABEL_WINDOW)
+                if k < len(label_rows) and label_rows[k] < i + REWARD_LABEL_WINDOW:
                     reward.append(text)
 
-        # 匹配当前任务对应的接受按钮（Y轴在任务范围内）
-        for btn_y, btn_box in self.accept_buttons:
-            if group_min_y <= btn_y <= group_max_y:
-                accept_button_box = self._get_box(btn_box)
-                break
-
-        # 匹配当前任务对应的放弃按钮（Y轴在任务范围内）
-        for btn_y, btn_box in self.abandon_buttons:
-            if group_min_y <= btn_y <= group_max_y:
-                abandon_button_box = self._get_box(btn_box)
-                break
+        # 黑名单只做完全匹配，模糊匹配可能把相近的正常任务拉黑
+        if not task_name or task_name in self.task_blacklist:
+            return False
 
-        if not task_name:
-            return None
+        # 匹配当前任务对应的接受/放弃按钮（Y轴在任务范围内）
+        accept_box = self.accept_buttons.first_between(group_min_y, group_max_y)
+        abandon_box = self.abandon_buttons.first_between(group_min_y, group_max_y)
 
+        table.names.append(task_name)
+        table.descriptions.append(task_description)
         # 整理奖励格式
-        reward_str = " + ".join(reward) if reward else None
-
-        return TaskInfo(
-            task_name=task_name,
-            task_description=task_description,
-            reward=reward_str,
-            time_limit=time_limit,
-            enemy_level=enemy_level,
-            accept_button_box=accept_button_box,
-            abandon_button_box=abandon_button_box,
+        table.rewards.append(" + ".join(reward) if reward else None)
+        table.time_limits.append(time_limit)
+        table.enemy_levels.append(enemy_level)
+        table.top_ys.append(group_min_y)
+        table.bottom_ys.append(group_max_y)
+        table.accept_boxes.append(
+            self._get_box(accept_box) if accept_box is not None else None
         )
+        table.abandon_boxes.append(
+            self._get_box(abandon_box) if abandon_box is not None else None
+        )
+        return True
 
     def _is_description(self, text: str) -> bool:
         """判断是否为任务描述"""
-        description_starts = [
-            "有一名",
-            "有一",
-            "一名",
-            "一支",
-            "必须",
-            "委托",
-            "尽快",
-            "一位",
-            "这个",
-        ]
-        for pattern in description_starts:
-            if text.startswith(pattern):
-                return True
-        return len(text) >= 15
+        return _is_description(text)
 
     def print_task_details(self, tasks: List[TaskInfo]):
         """输出任务详情"""
@@ -1,5 +1,4 @@
-import action.zshg.task_extractor
+from action.common.action_registry import register_lazy_actions
 
-import action.fight.fight_utils
-import action.fight.fight_processor
-import action.zshg.child
+# 只注册桩动作，各动作模块在首次调用时才导入，见 ACTION_MANIFEST
+register_lazy_actions()
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import json
+import hashlib
+import importlib
 import subprocess
 from pathlib import Path
+from importlib import metadata
 
 # utf-8
 sys.stdout.reconfigure(encoding="utf-8")
@@ -23,11 +27,23 @@ print(f"set cwd: {os.getcwd()}")
 if current_script_dir not in sys.path:
     sys.path.insert(0, current_script_dir)
 
+from startup_timing import StartupTimer, append_startup_record, import_profiler_from_env
+
+# 尽早开始计时；导入耗时分析需要在导入 utils 之前安装
+startup_timer = StartupTimer()
+import_profiler = import_profiler_from_env()
+
 from utils import logger
 
 VENV_NAME = ".venv"  # 虚拟环境目录的名称
 VENV_DIR = Path(project_root_dir) / VENV_NAME
 
+# 依赖指纹文件，记录上次成功安装时的依赖状态
+DEPS_STAMP_PATH = Path(project_root_dir) / "config" / "deps_stamp.json"
+
+# 启动耗时记录文件
+STARTUP_TIMING_PATH = Path(project_root_dir) / "debug" / "startup_timing.json"
+
 ### 虚拟环境相关 ###
 
 
@@ -53,6 +69,15 @@ def _is_running_in_our_venv():
             return False
 
 
+def _flush_logs():
+    """替换进程映像前刷新日志，loguru 的 enqueue 队列不会保留到新进程"""
+    complete = getattr(logger, "complete", None)
+    if complete:
+        complete()
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+
 def ensure_venv_and_relaunch_if_needed():
     """
     确保venv存在，并且如果尚未在脚本管理的venv中运行，
@@ -110,6 +135,15 @@ def ensure_venv_and_relaunch_if_needed():
         cmd = [str(python_in_venv)] + sys.argv
         logger.info(f"执行命令: {' '.join(cmd)}")
 
+        if not sys.platform.startswith("win"):
+            # 直接替换当前进程映像，不再常驻一个等待子进程的 Python
+            _flush_logs()
+            try:
+                os.execv(str(python_in_venv), cmd)
+            except OSError as e:
+                logger.warning(f"exec 重新启动失败，改用子进程启动: {e}")
+
+        # Windows 上 os.execv 会新建进程并让原进程立即退出，调用方会误以为 agent 已结束
         result = subprocess.run(
             cmd,
             cwd=os.getcwd(),
@@ -316,45 +350,155 @@ def install_requirements(req_file="requirements.txt", pip_config=None) -> bool:
             return False
 
 
+### 依赖指纹相关 ###
+
+
+def _parse_requirements(req_path: Path) -> list:
+    """解析 requirements.txt，返回 (包名, 比较符, 版本) 列表"""
+    requirements = []
+    pattern = re.compile(r"^([A-Za-z0-9_.\-]+)\s*(==|>=|<=|~=|!=|>|<)?\s*([^\s;#]*)")
+    for line in req_path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        match = pattern.match(line)
+        if match:
+            requirements.append(match.groups())
+    return requirements
+
+
+def compute_deps_fingerprint(req_file="requirements.txt"):
+    """
+    计算当前依赖指纹：requirements 哈希、解释器路径和已安装的发行版版本
+
+    Returns:
+        dict | None: 依赖指纹；有依赖未安装或固定版本不一致时返回 None
+    """
+    req_path = Path(project_root_dir) / req_file
+    if not req_path.exists():
+        return None
+
+    distributions = {}
+    for name, op, version in _parse_requirements(req_path):
+        try:
+            installed = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            logger.debug(f"依赖 {name} 未安装")
+            return None
+        if op == "==" and installed != version:
+            logger.debug(f"依赖 {name} 版本为 {installed}，要求 {version}")
+            return None
+        distributions[name] = installed
+
+    return {
+        "requirements_sha256": hashlib.sha256(req_path.read_bytes()).hexdigest(),
+        "python": sys.executable,
+        "distributions": distributions,
+    }
+
+
+def deps_up_to_date(req_file="requirements.txt") -> bool:
+    """依赖指纹与上次成功安装时一致则返回 True"""
+    if not DEPS_STAMP_PATH.exists():
+        return False
+    try:
+        with open(DEPS_STAMP_PATH, "r", encoding="utf-8") as f:
+            stamp = json.load(f)
+    except Exception:
+        logger.debug("读取依赖指纹失败")
+        return False
+    current = compute_deps_fingerprint(req_file)
+    return current is not None and current == stamp
+
+
+def write_deps_stamp(req_file="requirements.txt"):
+    """记录当前依赖指纹"""
+    fingerprint = compute_deps_fingerprint(req_file)
+    if fingerprint is None:
+        logger.warning("安装后仍有依赖不满足要求，不记录依赖指纹")
+        return
+    try:
+        DEPS_STAMP_PATH.parent.mkdir(exist_ok=True)
+        with open(DEPS_STAMP_PATH, "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f, indent=4, ensure_ascii=False)
+    except Exception:
+        logger.exception("写入依赖指纹失败")
+
+
 def check_and_install_dependencies():
     """检查并安装项目依赖"""
-    pip_config = read_pip_config()
+    with startup_timer.phase("read_pip_config"):
+        pip_config = read_pip_config()
     enable_pip_install = pip_config.get("enable_pip_install", True)
 
     logger.info(f"启用 pip 安装依赖: {enable_pip_install}")
 
     if enable_pip_install:
+        with startup_timer.phase("deps_check"):
+            up_to_date = deps_up_to_date()
+        if up_to_date:
+            logger.info("依赖未变化，跳过 pip 安装")
+            return
+
         logger.info("开始安装/更新依赖")
-        if install_requirements(pip_config=pip_config):
+        with startup_timer.phase("pip_install"):
+            installed = install_requirements(pip_config=pip_config)
+        if installed:
             logger.info("依赖检查和安装完成")
+            write_deps_stamp()
         else:
             logger.warning("依赖安装失败，程序可能无法正常运行")
     else:
         logger.info("Pip 依赖安装已禁用，跳过依赖安装")
 
 
+### 启动耗时相关 ###
+
+
+def report_startup_timing():
+    """输出各启动阶段耗时，并追加到启动耗时记录文件"""
+    logger.info(startup_timer.summary())
+
+    extra = {}
+    if import_profiler is not None:
+        import_profiler.uninstall()
+        logger.info("模块导入耗时（累计前 20）:")
+        logger.info(f"{'self [us]':>10} | {'cumulative':>10} | module")
+        for record in import_profiler.top(20):
+            logger.info(
+                f"{record['self_us']:>10} | {record['cumulative_us']:>10} | "
+                f"{'  ' * record['depth']}{record['module']}"
+            )
+        extra["imports"] = import_profiler.records
+
+    try:
+        append_startup_record(STARTUP_TIMING_PATH, startup_timer.record(**extra))
+    except Exception:
+        logger.exception("写入启动耗时记录失败")
+
+
 ### 核心业务 ###
 
 
 def agent(is_dev_mode=False):
     try:
-        # 清理模块缓存
-        utils_modules = [
-            name for name in list(sys.modules.keys()) if name.startswith("utils")
-        ]
-        for module_name in utils_modules:
-            del sys.modules[module_name]
+        with startup_timer.phase("utils_reload"):
+            # 清理模块缓存
+            utils_modules = [
+                name for name in list(sys.modules.keys()) if name.startswith("utils")
+            ]
+            for module_name in utils_modules:
+                del sys.modules[module_name]
 
-        # 动态导入 utils 的所有内容
-        import utils
-        import importlib
+            # 动态导入 utils 的所有内容
+            import utils
 
-        importlib.reload(utils)
+            importlib.reload(utils)
 
-        # 将 utils 的所有公共属性导入到当前命名空间
-        for attr_name in dir(utils):
-            if not attr_name.startswith("_"):
-                globals()[attr_name] = getattr(utils, attr_name)
+            # 将 utils 的所有公共属性导入到当前命名空间
+            for attr_name in dir(utils):
+                if not attr_name.startswith("_"):
+                    globals()[attr_name] = getattr(utils, attr_name)
 
         if is_dev_mode:
             from utils.logger import change_console_level
@@ -362,12 +506,15 @@ def agent(is_dev_mode=False):
             change_console_level("DEBUG")
             logger.info("开发模式：日志等级已设置为DEBUG")
 
-        from maa.agent.agent_server import AgentServer
-        from maa.toolkit import Toolkit
+        with startup_timer.phase("import_maa"):
+            from maa.agent.agent_server import AgentServer
+            from maa.toolkit import Toolkit
 
-        import agent_allfile
+        with startup_timer.phase("register_actions"):
+            import agent_allfile
 
-        Toolkit.init_option("./")
+        with startup_timer.phase("Toolkit.init_option"):
+            Toolkit.init_option("./")
 
         socket_id = "default_socket_id"
         if len(sys.argv) < 2:
@@ -378,11 +525,17 @@ def agent(is_dev_mode=False):
             socket_id = sys.argv[-1]
 
         logger.info(f"socket_id: {socket_id}")
-        AgentServer.start_up(socket_id)
+        with startup_timer.phase("AgentServer.start_up"):
+            AgentServer.start_up(socket_id)
         logger.info("AgentServer启动")
+        report_startup_timing()
         AgentServer.join()
         AgentServer.shut_down()
         logger.info("AgentServer关闭")
+
+        from action.common.action_registry import log_import_report
+
+        log_import_report()
     except ImportError as e:
         logger.error(f"导入模块失败: {e}")
         logger.error("考虑重新配置环境")
@@ -396,12 +549,15 @@ def agent(is_dev_mode=False):
 
 
 def main():
-    current_version = read_interface_version()
+    with startup_timer.phase("read_interface_version"):
+        current_version = read_interface_version()
     is_dev_mode = current_version == "DEBUG"
+    startup_timer.info["version"] = current_version
 
     # 如果是Linux系统或开发模式，启动虚拟环境
     if sys.platform.startswith("linux") or is_dev_mode:
-        ensure_venv_and_relaunch_if_needed()
+        with startup_timer.phase("venv_check"):
+            ensure_venv_and_relaunch_if_needed()
 
     check_and_install_dependencies()
 
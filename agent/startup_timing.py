@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+启动耗时统计
+
+分阶段记录从进程启动到 AgentServer.start_up 的耗时，
+并可选地记录每个模块的导入耗时（类似 python -X importtime）。
+在 utils 之前导入，只依赖标准库。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 首次启动的时间戳，经环境变量传给 exec 重新启动后的进程
+LAUNCH_TIME_ENV = "MAAGC_LAUNCH_TIME"
+# 设置该环境变量为 1 时启用模块导入耗时分析
+IMPORT_PROFILE_ENV = "MAAGC_IMPORT_PROFILE"
+# 启动记录文件中保留的历史条数
+HISTORY_LIMIT = 50
+
+
+class StartupTimer:
+    """
+    分阶段启动计时器
+    """
+
+    def __init__(self):
+        os.environ.setdefault(LAUNCH_TIME_ENV, str(time.time()))
+        self.launch_time = float(os.environ[LAUNCH_TIME_ENV])
+        self.start = time.perf_counter()
+        self.phases: List[Dict] = []
+        self.info: Dict = {}  # 附加信息，如接口版本
+
+    @contextmanager
+    def phase(self, name: str):
+        """记录 with 块的耗时，异常时同样记录"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append(
+                {"phase": name, "ms": round((time.perf_counter() - start) * 1000, 1)}
+            )
+
+    def summary(self) -> str:
+        """单行耗时摘要，用于日志"""
+        parts = [f"{p['phase']} {p['ms']:.0f}ms" for p in self.phases]
+        total = (time.perf_counter() - self.start) * 1000
+        return f"启动耗时 {total:.0f}ms: " + ", ".join(parts)
+
+    def record(self, **extra) -> Dict:
+        """生成一条启动记录"""
+        return {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.executable,
+            "pid": os.getpid(),
+            # 从首次启动（含 venv 重新启动前的进程）算起
+            "since_launch_ms": round((time.time() - self.launch_time) * 1000, 1),
+            # 从当前进程导入 main.py 算起
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 1),
+            "phases": self.phases,
+            **self.info,
+            **extra,
+        }
+
+
+def append_startup_record(path: Path, record: Dict):
+    """将启动记录追加到 JSON 文件，只保留最近 HISTORY_LIMIT 条"""
+    history = []
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            history = []
+    history = (history + [record])[-HISTORY_LIMIT:]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class _TimedLoader:
+    """
+    包装模块加载器，计时 exec_module；执行前先还原 spec 和模块上的原加载器
+    """
+
+    def __init__(self, loader, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        spec = module.__spec__
+        spec.loader = self._loader
+        module.__loader__ = self._loader
+        with self._profiler.measure(spec.name):
+            self._loader.exec_module(module)
+
+
+class ImportProfiler:
+    """
+    模块导入耗时分析
+
+    插入 sys.meta_path 最前面，为找到的模块包装加载器。
+    self 为模块自身执行耗时，cumulative 含其导入的子模块，与 -X importtime 含义一致。
+    """
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self._local = threading.local()
+        self._finding = set()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        # 避免其它查找器内部导入时递归
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.discard(fullname)
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    @contextmanager
+    def measure(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        # [模块名, 开始时间, 子模块累计耗时]
+        frame = [name, time.perf_counter(), 0.0]
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            cumulative = time.perf_counter() - frame[1]
+            if stack:
+                stack[-1][2] += cumulative
+            self.records.append(
+                {
+                    "module": name,
+                    "self_us": round((cumulative - frame[2]) * 1e6),
+                    "cumulative_us": round(cumulative * 1e6),
+                    "depth": len(stack),
+                }
+            )
+
+    def top(self, count: int = 20, key: str = "cumulative_us") -> List[Dict]:
+        return sorted(self.records, key=lambda r: r[key], reverse=True)[:count]
+
+
+def import_profiler_from_env() -> Optional[ImportProfiler]:
+    """按环境变量创建并安装导入耗时分析器，未启用时返回 None"""
+    if os.environ.get(IMPORT_PROFILE_ENV) != "1":
+        return None
+    profiler = ImportProfiler()
+    profiler.install()
+    return profiler
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+TaskExtractor 基准测试
+
+使用录制的任务面板 OCR 结果（每行一页的 JSON Lines）测量解析耗时。
+录制方法：设置环境变量 MAAGC_RECORD_TASK_PAGES=1 运行任务，
+OCR 结果会追加到 debug/task_pages.jsonl。
+
+用法：
+    python tools/bench_task_extractor.py debug/task_pages.jsonl --rounds 20
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "agent"))
+
+from action.zshg.task_extractor import TaskExtractor
+
+
+def load_pages(path: Path) -> list:
+    pages = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                pages.append(json.loads(line))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TaskExtractor 基准测试")
+    parser.add_argument("pages", type=Path, help="录制的 OCR 结果文件（JSON Lines）")
+    parser.add_argument("--rounds", type=int, default=20, help="重复轮数")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print(f"{args.pages} 中没有录制的页面")
+        return 1
+    line_count = sum(len(page) for page in pages)
+
+    extractor = TaskExtractor()
+    task_count = sum(len(extractor.extract_tasks(page)) for page in pages)
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for page in pages:
+            extractor.extract_tasks(page)
+    elapsed = time.perf_counter() - start
+
+    # 基准测试不写回任务名称
+    extractor.known_task_names.dirty = False
+
+    parses = args.rounds * len(pages)
+    print(f"页面数: {len(pages)}，OCR 行数: {line_count}，解析出任务: {task_count}")
+    print(f"平均每页: {elapsed / parses * 1e6:.1f} us")
+    print(f"吞吐: {line_count * args.rounds / elapsed:.0f} 行/秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())